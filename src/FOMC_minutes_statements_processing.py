@@ -1,5 +1,9 @@
 import pandas as pd
 import os
+from corpus_store import write_corpus_store
+
+# Column holding the document text in each cleaned CSV
+CONTENT_COLUMNS = {"Minutes": "Federal_Reserve_Mins", "Statements": "FOMC_Statements"}
 
 # Clean the raw FOMC data from CSV files
 def clean_fomc_data(filepath, doc_type):
@@ -122,7 +126,7 @@ def save_individual_files(input_file, output_dir, doc_type):
         output_path = os.path.join(output_dir, file_name)
 
         # Get the relevant content (either minutes or statements)
-        content = row['Federal_Reserve_Mins'] if doc_type == "Minutes" else row['FOMC_Statements']
+        content = row[CONTENT_COLUMNS[doc_type]]
         
         # Wrap the content to ensure 10 words per line
         wrapped_content = wrap_text(content, words_per_line=10)
@@ -134,6 +138,47 @@ def save_individual_files(input_file, output_dir, doc_type):
     print(f"Saved individual files in {output_dir}")
 
 
+# Stream the documents of a cleaned CSV without writing individual files
+def stream_cleaned_documents(input_file, doc_type, chunksize=50):
+    """
+    Reads a cleaned FOMC CSV in chunks and yields its documents one by one, so they can be
+    scored directly instead of going through the individual text files.
+    Document ids match the file names written by `save_individual_files` (e.g. '2024-05-01_Minutes.txt').
+    
+    Args:
+    input_file (str): Path to the cleaned CSV file.
+    doc_type (str): The type of document (e.g., "Minutes", "Statements").
+    chunksize (int): Number of rows read from the CSV at a time.
+
+    Yields:
+    tuple: (doc_id, date, text) for each row, in file order.
+    """
+    content_column = CONTENT_COLUMNS[doc_type]
+
+    for chunk in pd.read_csv(input_file, usecols=['Date', content_column], chunksize=chunksize):
+        for date_str, content in zip(chunk['Date'], chunk[content_column]):
+            yield f"{date_str}_{doc_type}.txt", pd.to_datetime(date_str), content
+
+
+# Pack the rows of a cleaned CSV into a single memory-mapped corpus store
+def save_corpus_store(input_file, store_path, doc_type):
+    """
+    Packs each row of the input CSV into a corpus store (one data file plus an offset index, see
+    corpus_store.py) instead of one text file per row. Document ids, dates and the wrapped text
+    match the files written by `save_individual_files`.
+    
+    Args:
+    input_file (str): Path to the cleaned CSV file whose rows will be packed.
+    store_path (str): Path prefix of the corpus store (without extension).
+    doc_type (str): The type of document (e.g., "Minutes", "Statements").
+    """
+    documents = ((doc_id, date, wrap_text(content, words_per_line=10))
+                 for doc_id, date, content in stream_cleaned_documents(input_file, doc_type))
+    count = write_corpus_store(store_path, documents, doc_type)
+
+    print(f"Packed {count} documents into the corpus store {store_path}")
+
+
 # Rest of the module remains unchanged
 def create_individual_files_for_minutes_and_statements():
     """
@@ -154,3 +199,7 @@ if __name__ == "__main__":
     
     # Create individual files for easier reading and analysis
     create_individual_files_for_minutes_and_statements()
+
+    # Pack the same documents into memory-mapped corpus stores for the scoring stages
+    save_corpus_store('data/processed/cleaned_meeting_minutes.csv', 'data/processed/corpus_store/meeting_minutes', 'Minutes')
+    save_corpus_store('data/processed/cleaned_statements.csv', 'data/processed/corpus_store/statements', 'Statements')
@@ -0,0 +1,416 @@
+import os
+import sys
+import time
+import subprocess
+import math
+import warnings
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from dictionary_based_analysis import load_dictionary, build_count_matrix, compute_weighted_scores
+
+
+def _time_call(func, *args, repeat=3, **kwargs):
+    """
+    Run func(*args, **kwargs) `repeat` times and return (best wall-clock seconds, last result).
+    """
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _legacy_weighted_scores(count_matrix, total_word_count) -> np.ndarray:
+    """
+    The former scalar implementation of the weighted TF-IDF score (docs x words `iloc` loop),
+    kept here only as the baseline for benchmark_tfidf_engine.
+    """
+    count_matrix_df = pd.DataFrame(count_matrix.toarray())
+    stats_df = pd.DataFrame({'Total_Words': total_word_count})
+
+    warnings.simplefilter(action='ignore', category=FutureWarning)
+
+    df_tf_idf = count_matrix_df.copy()
+    df_i = [0] * count_matrix_df.shape[1]
+
+    for i in range(df_tf_idf.shape[0]):
+        for j in range(df_tf_idf.shape[1]):
+            if df_tf_idf.iloc[i, j]:
+                df_tf_idf.iloc[i, j] = (1 + math.log(df_tf_idf.iloc[i, j])) / (1 + math.log(stats_df['Total_Words'][i]))
+                df_i[j] += 1
+
+    df_i = [math.log(df_tf_idf.shape[0] / i) if i else 0 for i in df_i]
+    df_tf_idf = df_tf_idf.mul(df_i, axis=1)
+
+    return (df_tf_idf * count_matrix_df).sum(axis=1).values
+
+
+def benchmark_tfidf_engine(dictionary_path='data/processed/hawkish_gpt_dict2.txt', text_files_dir='data/raw/fed_speeches',
+                           scales=(1, 10, 100), legacy_max_scale=1) -> pd.DataFrame:
+    """
+    Benchmark the vectorized TF-IDF scoring engine against the former scalar loop.
+
+    The real count matrix of `text_files_dir` is tiled `scale` times to simulate corpora
+    10-100x larger than today's. The legacy loop is only timed up to `legacy_max_scale`
+    since it grows linearly in docs x words scalar pandas accesses.
+
+    Returns:
+    pd.DataFrame: Timings (seconds) for each corpus scale.
+    """
+    words_list = load_dictionary(dictionary_path)
+    count_matrix, total_word_count, _ = build_count_matrix(words_list, text_files_dir)
+
+    rows = []
+    for scale in scales:
+        scaled_counts = sparse.vstack([count_matrix] * scale, format='csr')
+        scaled_totals = np.tile(total_word_count, scale)
+
+        vectorized_time, vectorized_scores = _time_call(compute_weighted_scores, scaled_counts, scaled_totals)
+
+        legacy_time = np.nan
+        if scale <= legacy_max_scale:
+            legacy_time, legacy_scores = _time_call(_legacy_weighted_scores, scaled_counts, scaled_totals, repeat=1)
+            assert np.array_equal(legacy_scores, vectorized_scores), "Vectorized scores differ from the legacy loop"
+
+        rows.append({
+            'Scale': scale,
+            'Documents': scaled_counts.shape[0],
+            'Words': scaled_counts.shape[1],
+            'Vectorized_Seconds': vectorized_time,
+            'Legacy_Seconds': legacy_time,
+            'Speedup': legacy_time / vectorized_time,
+        })
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_phrase_engine(dictionary_path='data/processed/hawkish_gpt_dict.txt',
+                            corpora=('data/raw/fomc_press_conf/texts', 'data/raw/FOMC/statements',
+                                     'data/raw/FOMC/meeting_minutes', 'data/raw/fed_speeches')) -> pd.DataFrame:
+    """
+    Benchmark the compiled phrase matcher engine against the split/Counter engine: counting time
+    and number of dictionary hits found (all entries, and multi-word entries only).
+
+    Returns:
+    pd.DataFrame: Timings (seconds) and hit counts for each corpus and engine.
+    """
+    words_list = load_dictionary(dictionary_path)
+    multi_word = np.array([len(word.split()) > 1 for word in words_list])
+
+    rows = []
+    for text_files_dir in corpora:
+        for engine in ('split', 'phrase'):
+            seconds, (count_matrix, _, txt_files) = _time_call(build_count_matrix, words_list, text_files_dir, engine=engine)
+            hits = np.asarray(count_matrix.sum(axis=0)).ravel()
+            rows.append({
+                'Corpus': text_files_dir,
+                'Engine': engine,
+                'Documents': len(txt_files),
+                'Seconds': seconds,
+                'Dictionary_Hits': int(hits.sum()),
+                'Multi_Word_Hits': int(hits[multi_word].sum()),
+            })
+
+    return pd.DataFrame(rows)
+
+
+def _legacy_long_text_embedding(factor_similarity, text, chunk_size=512) -> np.ndarray:
+    """
+    The former chunk loop of factor_similarity.get_embedding_for_long_text: token slices decoded
+    back to text and re-tokenized, one chunk per forward pass with autograd enabled, kept here
+    only as the baseline for benchmark_embedding_inference.
+    """
+    tokenizer, model = factor_similarity.load_finbert()
+    tokens = tokenizer.encode(factor_similarity.preprocess_text(text), truncation=False)
+
+    embeddings = []
+    for i in range(0, len(tokens), chunk_size):
+        chunk = tokenizer.decode(tokens[i:i+chunk_size], skip_special_tokens=True)
+        inputs = tokenizer(chunk, return_tensors="pt", truncation=True, padding=True, max_length=512)
+        outputs = model(**inputs)
+        embeddings.append(outputs.last_hidden_state.mean(dim=1).detach().numpy())
+    return np.mean(embeddings, axis=0)
+
+
+def benchmark_embedding_inference(text_files_dir='data/raw/FOMC/meeting_minutes', n_docs=10, batch_sizes=(1, 8, 16, 32)) -> pd.DataFrame:
+    """
+    Benchmark FinBERT document embedding throughput on CPU (documents per second): the former
+    one-chunk-at-a-time loop, batched chunks per document, and chunks batched across documents.
+
+    Returns:
+    pd.DataFrame: Timings and throughput for each inference path and batch size.
+    """
+    # Imported here so the dictionary benchmarks do not load FinBERT
+    import factor_similarity
+
+    txt_files = sorted(f for f in os.listdir(text_files_dir) if f.endswith('.txt'))[-n_docs:]
+    texts = []
+    for txt_file in txt_files:
+        with open(os.path.join(text_files_dir, txt_file), 'r', encoding='utf-8') as file:
+            texts.append(file.read())
+
+    runs = [('legacy', 1, lambda: [_legacy_long_text_embedding(factor_similarity, text) for text in texts])]
+    for batch_size in batch_sizes:
+        runs.append(('per_document', batch_size,
+                     lambda batch_size=batch_size: [factor_similarity.get_embedding_for_long_text(text, batch_size=batch_size) for text in texts]))
+        runs.append(('across_documents', batch_size,
+                     lambda batch_size=batch_size: factor_similarity.get_embeddings_for_long_texts(texts, batch_size=batch_size)))
+
+    rows = []
+    for path, batch_size, run in runs:
+        seconds, _ = _time_call(run, repeat=1)
+        rows.append({
+            'Path': path,
+            'Batch_Size': batch_size,
+            'Documents': len(texts),
+            'Seconds': seconds,
+            'Documents_Per_Second': len(texts) / seconds,
+        })
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_inference_backends(corpora=('data/raw/FOMC/meeting_minutes', 'data/raw/FOMC/statements'), n_docs=10,
+                                 backends=('torch', 'torch-int8', 'onnx')) -> pd.DataFrame:
+    """
+    Parity report and throughput benchmark of the FinBERT inference backends of factor_similarity.
+    For each corpus, the latest `n_docs` documents are embedded and scored against the hawkish/dovish
+    anchors with every backend; the drift of the cosine scores is measured against fp32 PyTorch.
+
+    Returns:
+    pd.DataFrame: Per corpus and backend: throughput, score drift vs fp32 and the lowest cosine
+                  between a document's backend and fp32 embeddings, with the checkpoint they come from.
+    """
+    # Imported here so the dictionary benchmarks do not load FinBERT
+    import factor_similarity
+    from sklearn.metrics.pairwise import paired_cosine_distances
+
+    # The checkpoint actually loaded (a local copy may stand in for the Hub model), so numbers are comparable
+    config = factor_similarity.load_finbert()[1].config
+    model_label = f"{config._name_or_path} ({config.num_hidden_layers} layers, hidden {config.hidden_size})"
+
+    rows = []
+    for text_files_dir in corpora:
+        txt_files = sorted(f for f in os.listdir(text_files_dir) if f.endswith('.txt'))[-n_docs:]
+        texts = []
+        for txt_file in txt_files:
+            with open(os.path.join(text_files_dir, txt_file), 'r', encoding='utf-8') as file:
+                texts.append(file.read())
+
+        reference = None
+        for backend in backends:
+            factor_similarity.set_backend(backend)
+            try:
+                # Warm-up builds the quantized model / ONNX session outside the timing
+                factor_similarity.get_embedding('warm up')
+                seconds, embeddings = _time_call(factor_similarity.get_embeddings_for_long_texts, texts, repeat=1)
+                scores = factor_similarity.score_document_embeddings(embeddings).values
+            finally:
+                factor_similarity.set_backend('torch')
+
+            if reference is None:
+                reference = (embeddings, scores)
+            score_drift = np.abs(scores - reference[1])
+            rows.append({
+                'Model': model_label,
+                'Corpus': text_files_dir,
+                'Backend': backend,
+                'Documents': len(texts),
+                'Seconds': seconds,
+                'Documents_Per_Second': len(texts) / seconds,
+                'Max_Score_Drift': score_drift.max(),
+                'Mean_Score_Drift': score_drift.mean(),
+                'Min_Embedding_Cosine': 1 - paired_cosine_distances(embeddings, reference[0]).max(),
+            })
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_token_budget_batching(corpora=('data/raw/FOMC/statements', 'data/raw/FOMC/meeting_minutes', 'data/raw/fomc_press_conf/texts'),
+                                    n_docs=10, batch_size=16, token_budgets=(4096, 8192, 16384)) -> pd.DataFrame:
+    """
+    Benchmark fixed-size chunk batches against length-bucketed batches with a token budget on a
+    mixed corpus (the latest `n_docs` documents of each corpus, so short statement chunks and long
+    minutes/transcript chunks share the run): padding efficiency, throughput and drift of the
+    document embeddings vs the fixed-size batches.
+
+    Returns:
+    pd.DataFrame: One row per batching scheme.
+    """
+    # Imported here so the dictionary benchmarks do not load FinBERT
+    import factor_similarity
+
+    texts = []
+    for text_files_dir in corpora:
+        txt_files = sorted(f for f in os.listdir(text_files_dir) if f.endswith('.txt'))[-n_docs:]
+        for txt_file in txt_files:
+            with open(os.path.join(text_files_dir, txt_file), 'r', encoding='utf-8') as file:
+                texts.append(file.read())
+
+    chunks = [factor_similarity.split_into_token_chunks(text) for text in texts]
+    flat_chunks = [chunk for doc_chunks in chunks for chunk in doc_chunks]
+
+    # Warm-up so the first timed run does not pay for the model load
+    factor_similarity.get_embeddings_for_token_chunks(flat_chunks[:1])
+
+    rows = []
+    reference = None
+    for max_tokens in (None,) + tuple(token_budgets):
+        stats = {}
+        embeddings = factor_similarity.get_embeddings_for_token_chunks(flat_chunks, batch_size, max_tokens, stats)
+        if reference is None:
+            reference = embeddings
+        rows.append({
+            'Batching': f'fixed {batch_size} chunks' if max_tokens is None else f'budget {max_tokens} tokens',
+            **stats,
+            'Max_Embedding_Drift': np.abs(embeddings - reference).max(),
+        })
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_text_normalization(text_files_dir='data/raw/FOMC/meeting_minutes', repeat=3) -> pd.DataFrame:
+    """
+    Benchmark the shared fast normalizer (text_normalization.py) against the NLTK preprocessing of
+    factor_similarity on a whole corpus: throughput and how many of the NLTK words the fast
+    normalizer reproduces (multiset overlap, per corpus).
+
+    Returns:
+    pd.DataFrame: Timings and word counts for each preprocessing path.
+    """
+    # Imported here so the dictionary benchmarks do not load NLTK
+    from collections import Counter
+    import factor_similarity
+    from text_normalization import finbert_normalizer
+
+    txt_files = sorted(f for f in os.listdir(text_files_dir) if f.endswith('.txt'))
+    texts = []
+    for txt_file in txt_files:
+        with open(os.path.join(text_files_dir, txt_file), 'r', encoding='utf-8') as file:
+            texts.append(file.read())
+
+    # Load the NLTK tokenizer and stop words outside the timing
+    factor_similarity.load_nltk_resources()
+
+    runs = {
+        'nltk': lambda: [factor_similarity.preprocess_text_nltk(text) for text in texts],
+        'fast': lambda: finbert_normalizer.normalize_batch(texts),
+    }
+    outputs = {}
+    rows = []
+    for path, run in runs.items():
+        seconds, normalized = _time_call(run, repeat=repeat)
+        outputs[path] = Counter(word for text in normalized for word in text.split())
+        rows.append({
+            'Path': path,
+            'Documents': len(texts),
+            'Seconds': seconds,
+            'Documents_Per_Second': len(texts) / seconds,
+            'Words': sum(outputs[path].values()),
+        })
+
+    rows_df = pd.DataFrame(rows)
+    nltk_words = outputs['nltk']
+    rows_df['Share_Of_NLTK_Words'] = [sum((outputs[path] & nltk_words).values()) / max(sum(nltk_words.values()), 1) for path in runs]
+    rows_df['Speedup'] = rows_df['Seconds'].iloc[0] / rows_df['Seconds']
+    return rows_df
+
+
+def benchmark_token_shards(text_files_dir='data/raw/FOMC/meeting_minutes', shard_dir='data/cache/token_shards', repeat=3) -> pd.DataFrame:
+    """
+    Benchmark the FinBERT input stage: preprocessing and tokenizing every document into chunks
+    against reading the same chunks from the pre-tokenized shards (token_shards.py), after a
+    one-off build step. The chunks of both paths are checked to be identical.
+
+    Returns:
+    pd.DataFrame: Timings for the build step and each input path.
+    """
+    # Imported here so the dictionary benchmarks do not load FinBERT
+    import factor_similarity
+
+    txt_files = sorted(f for f in os.listdir(text_files_dir) if f.endswith('.txt'))
+    texts = []
+    for txt_file in txt_files:
+        with open(os.path.join(text_files_dir, txt_file), 'r', encoding='utf-8') as file:
+            texts.append(file.read())
+
+    token_shards = factor_similarity.open_token_shards(shard_dir)
+    build_seconds, _ = _time_call(factor_similarity.build_token_shards, texts, token_shards, repeat=1)
+
+    tokenize_seconds, tokenized = _time_call(factor_similarity.get_document_chunks, texts, repeat=repeat)
+    shard_seconds, from_shards = _time_call(factor_similarity.get_document_chunks, texts, token_shards=token_shards, repeat=repeat)
+
+    rows_df = pd.DataFrame([
+        {'Path': 'build shards', 'Documents': len(texts), 'Seconds': build_seconds},
+        {'Path': 'tokenize', 'Documents': len(texts), 'Seconds': tokenize_seconds},
+        {'Path': 'token shards', 'Documents': len(texts), 'Seconds': shard_seconds},
+    ])
+    rows_df['Documents_Per_Second'] = rows_df['Documents'] / rows_df['Seconds']
+    rows_df['Speedup'] = tokenize_seconds / rows_df['Seconds']
+    rows_df['Same_Chunks'] = tokenized == from_shards
+    return rows_df
+
+
+def benchmark_startup(module='factor_similarity', repeat=3) -> pd.DataFrame:
+    """
+    Benchmark the startup cost of a module in a fresh interpreter: the bare import, and the import
+    followed by the first preprocessing call and FinBERT load (when factor_similarity is benchmarked).
+
+    Returns:
+    pd.DataFrame: Best wall-clock seconds of each startup step over `repeat` fresh interpreters.
+    """
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    steps = {'import': f"import {module}"}
+    if module == 'factor_similarity':
+        steps['import + preprocess_text'] = "import factor_similarity; factor_similarity.preprocess_text('Inflation is high.')"
+        steps['import + load_finbert'] = "import factor_similarity; factor_similarity.load_finbert()"
+
+    rows = []
+    for step, statement in steps.items():
+        # Time the statement inside the child so interpreter start-up itself is left out
+        code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+        seconds = []
+        for _ in range(repeat):
+            result = subprocess.run([sys.executable, '-c', code], cwd=os.getcwd(), capture_output=True, text=True,
+                                    env={**os.environ, 'PYTHONPATH': src_dir})
+            if result.returncode:
+                break
+            seconds.append(float(result.stdout.strip().splitlines()[-1]))
+        rows.append({
+            'Module': module,
+            'Step': step,
+            'Seconds': min(seconds) if seconds else np.nan,
+            'Error': result.stderr.strip().splitlines()[-1] if result.returncode else '',
+        })
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print("TF-IDF scoring engine: vectorized vs legacy loop")
+    print(benchmark_tfidf_engine())
+
+    print("Dictionary counting: phrase matcher vs split/Counter")
+    print(benchmark_phrase_engine())
+
+    print("FinBERT document embedding throughput (CPU)")
+    print(benchmark_embedding_inference())
+
+    print("FinBERT inference backends: parity vs fp32 and throughput")
+    print(benchmark_inference_backends())
+
+    print("FinBERT chunk batching: fixed batch size vs token budget")
+    print(benchmark_token_budget_batching())
+
+    print("Text normalization: fast normalizer vs NLTK on the meeting minutes")
+    print(benchmark_text_normalization())
+
+    print("FinBERT input: tokenization vs pre-tokenized token shards")
+    print(benchmark_token_shards())
+
+    print("factor_similarity startup time")
+    print(benchmark_startup())
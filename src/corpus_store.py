@@ -0,0 +1,231 @@
+import os
+import mmap
+import pandas as pd
+
+# A corpus store is a pair of files sharing a path prefix:
+#   <store_path>.bin        the UTF-8 text of every document, back to back
+#   <store_path>.index.csv  one row per document: Doc_ID, Date, Doc_Type, Offset, Length
+INDEX_COLUMNS = ['Doc_ID', 'Date', 'Doc_Type', 'Offset', 'Length']
+
+
+def _data_path(store_path):
+    return f"{store_path}.bin"
+
+
+def _index_path(store_path):
+    return f"{store_path}.index.csv"
+
+
+def store_exists(store_path) -> bool:
+    """
+    Whether a complete corpus store (data file and index) exists at this path prefix.
+    """
+    return os.path.exists(_data_path(store_path)) and os.path.exists(_index_path(store_path))
+
+
+class CorpusStoreWriter:
+    """
+    Writes documents into a packed corpus store (one data file plus an offset index), replacing
+    thousands of small .txt files. Use as a context manager so the index is written on exit.
+
+    The live store is never left inconsistent: a new store is written under temporary names and
+    swapped in on close, index last; appending writes past the end of the live data file, which
+    the old index never points to, and swaps in the new index on close. A writer that exits on
+    an exception discards what it wrote.
+    """
+
+    def __init__(self, store_path, append=False):
+        self.store_path = store_path
+        store_dir = os.path.dirname(store_path)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+        self._append = append and store_exists(store_path)
+        if self._append:
+            self._rows = pd.read_csv(_index_path(store_path)).to_dict('records')
+            self._data_path = _data_path(store_path)
+        else:
+            self._rows = []
+            self._data_path = f"{_data_path(store_path)}.tmp"
+        self._data_file = open(self._data_path, 'ab' if self._append else 'wb')
+        self._offset = self._data_file.tell()
+        self._initial_size = self._offset
+
+    def add(self, doc_id, date, doc_type, text):
+        """
+        Append one document to the store.
+
+        Args:
+        doc_id (str): Unique document id (e.g. the .txt file name it replaces).
+        date: Document date (anything pd.to_datetime understands).
+        doc_type (str): The type of document (e.g., "Minutes", "Statements").
+        text (str): Document text.
+        """
+        encoded = text.encode('utf-8')
+        self._data_file.write(encoded)
+        self._rows.append({
+            'Doc_ID': doc_id,
+            'Date': pd.Timestamp(date).strftime('%Y-%m-%d') if pd.notna(date) else '',
+            'Doc_Type': doc_type,
+            'Offset': self._offset,
+            'Length': len(encoded),
+        })
+        self._offset += len(encoded)
+
+    def close(self):
+        self._data_file.flush()
+        os.fsync(self._data_file.fileno())
+        self._data_file.close()
+
+        index_tmp_path = f"{_index_path(self.store_path)}.tmp"
+        pd.DataFrame(self._rows, columns=INDEX_COLUMNS).to_csv(index_tmp_path, index=False)
+
+        if not self._append:
+            # Without its index the old store no longer exists, so a crash between the two swaps
+            # never pairs the old index with the new data file
+            if os.path.exists(_index_path(self.store_path)):
+                os.remove(_index_path(self.store_path))
+            os.replace(self._data_path, _data_path(self.store_path))
+        os.replace(index_tmp_path, _index_path(self.store_path))
+
+    def abort(self):
+        """
+        Close the writer without touching the live store.
+        """
+        self._data_file.close()
+        if self._append:
+            # Drop the bytes appended past the end of the live data file
+            os.truncate(self._data_path, self._initial_size)
+        else:
+            os.remove(self._data_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_corpus_store(store_path, documents, doc_type, append=False) -> int:
+    """
+    Write a stream of documents into a packed corpus store.
+
+    Args:
+    store_path (str): Path prefix of the store (without extension).
+    documents (iterable): (doc_id, date, text) tuples.
+    doc_type (str): The type of document (e.g., "Minutes", "Statements").
+    append (bool): Add to an existing store instead of overwriting it.
+
+    Returns:
+    int: Number of documents written.
+    """
+    count = 0
+    with CorpusStoreWriter(store_path, append=append) as writer:
+        for doc_id, date, text in documents:
+            writer.add(doc_id, date, doc_type, text)
+            count += 1
+    return count
+
+
+def iter_text_files(text_files_dir):
+    """
+    Yield the .txt files of a directory as (doc_id, date, text) tuples, in filename order, with
+    the date parsed from the file name.
+    """
+    # Imported here so the store does not pull in the plotting/regression stack of results.py
+    from results import extract_date_from_filename
+
+    for txt_file in sorted(f for f in os.listdir(text_files_dir) if f.endswith('.txt')):
+        with open(os.path.join(text_files_dir, txt_file), 'r', encoding='utf-8') as file:
+            yield txt_file, extract_date_from_filename(txt_file), file.read()
+
+
+def pack_directory(text_files_dir, store_path, doc_type) -> int:
+    """
+    Pack every .txt file of a directory into a corpus store.
+
+    Args:
+    text_files_dir (str): Directory containing the text files.
+    store_path (str): Path prefix of the store (without extension).
+    doc_type (str): The type of document (e.g., "Speeches", "PressConferences").
+
+    Returns:
+    int: Number of documents packed.
+    """
+    return write_corpus_store(store_path, iter_text_files(text_files_dir), doc_type)
+
+
+class CorpusStore:
+    """
+    Read-only view of a packed corpus store. The data file is memory-mapped, so opening the
+    store costs one file open and any document is available by id without copying the rest.
+    """
+
+    def __init__(self, store_path):
+        self.store_path = store_path
+        self.index = pd.read_csv(_index_path(store_path), dtype={'Doc_ID': str, 'Date': str, 'Doc_Type': str},
+                                 keep_default_na=False)
+        self._positions = dict(zip(self.index['Doc_ID'], range(len(self.index))))
+
+        self._data_file = open(_data_path(store_path), 'rb')
+        # mmap cannot map an empty file
+        if os.fstat(self._data_file.fileno()).st_size:
+            self._mmap = mmap.mmap(self._data_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buffer = memoryview(self._mmap)
+        else:
+            self._mmap = None
+            self._buffer = memoryview(b'')
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._positions
+
+    @property
+    def doc_ids(self) -> list:
+        return self.index['Doc_ID'].tolist()
+
+    def _slice(self, position) -> memoryview:
+        offset = int(self.index['Offset'].iat[position])
+        return self._buffer[offset:offset + int(self.index['Length'].iat[position])]
+
+    def get_bytes(self, doc_id) -> memoryview:
+        """
+        Zero-copy view of a document's UTF-8 bytes. The view must be released (or dropped)
+        before the store is closed.
+        """
+        return self._slice(self._positions[doc_id])
+
+    def get_text(self, doc_id) -> str:
+        """
+        Decoded text of a document.
+        """
+        return str(self.get_bytes(doc_id), 'utf-8')
+
+    def iter_documents(self, doc_type=None):
+        """
+        Yield the documents of the store as (doc_id, date, text) tuples, in store order, the same
+        shape as FOMC_minutes_statements_processing.stream_cleaned_documents.
+
+        Args:
+        doc_type (str, optional): Only yield documents of this type.
+        """
+        for position, (doc_id, date, row_type) in enumerate(zip(self.index['Doc_ID'], self.index['Date'], self.index['Doc_Type'])):
+            if doc_type is None or row_type == doc_type:
+                yield doc_id, pd.to_datetime(date) if date else pd.NaT, str(self._slice(position), 'utf-8')
+
+    def close(self):
+        self._buffer.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._data_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,166 @@
+import os
+import numpy as np
+import pandas as pd
+
+from dictionary_based_analysis import load_dictionary, build_count_matrix, compute_weighted_contributions
+
+
+def leave_one_out_scores(count_matrix, total_word_count):
+    """
+    Compute the score of every document with each dictionary word left out, for all words at once.
+
+    A word's IDF only depends on its own document frequency and the document length T counts
+    every word of the document, so dropping a word from the dictionary leaves the contributions
+    of all the other words unchanged: the leave-one-out score is the full score minus that
+    word's contribution.
+
+    Args:
+    count_matrix (scipy.sparse matrix): Word counts with shape docs x words.
+    total_word_count (array-like): Total word count of each document.
+
+    Returns:
+    tuple: (np.ndarray of full scores per document,
+            np.ndarray of shape docs x words with the score of each document without each word)
+    """
+    contributions = compute_weighted_contributions(count_matrix, total_word_count)
+    full_scores = np.asarray(contributions.sum(axis=1)).ravel()
+    return full_scores, full_scores[:, None] - contributions.toarray()
+
+
+def word_contribution_table(words_list, count_matrix, total_word_count) -> pd.DataFrame:
+    """
+    Summarize how much each dictionary word contributes to the scores of a corpus.
+
+    Args:
+    words_list (list): Dictionary words (one column of count_matrix per entry).
+    count_matrix (scipy.sparse matrix): Word counts with shape docs x words.
+    total_word_count (array-like): Total word count of each document.
+
+    Returns:
+    pd.DataFrame: One row per dictionary word, in dictionary order, with the number of documents it
+                  occurs in, its total and mean contribution per document, its share of the total
+                  corpus score, and its largest share of a single document's score.
+    """
+    contributions = compute_weighted_contributions(count_matrix, total_word_count)
+    full_scores = np.asarray(contributions.sum(axis=1)).ravel()
+
+    # Share of each document's score, only where the word occurs and the score is non-zero
+    shares = contributions.multiply(1 / np.where(full_scores == 0, np.inf, full_scores)[:, None]).tocsc()
+
+    total_contribution = np.asarray(contributions.sum(axis=0)).ravel()
+    return pd.DataFrame({
+        'Word': words_list,
+        'Documents': np.bincount(contributions.indices, minlength=len(words_list)),
+        'Total_Contribution': total_contribution,
+        'Mean_Contribution': total_contribution / max(contributions.shape[0], 1),
+        'Share_Of_Total_Score': total_contribution / full_scores.sum() if full_scores.sum() else 0.0,
+        'Max_Document_Share': shares.max(axis=0).toarray().ravel(),
+    })
+
+
+def leave_one_out_r_squared(score_matrix, doc_dates, market_df, market_vars, window=5) -> pd.DataFrame:
+    """
+    R² of the regression_analysis regression (percentage change of the score between consecutive
+    documents vs. the cumulative market change over the next `window` market days) for every
+    column of a score matrix at once.
+
+    Args:
+    score_matrix (np.ndarray): Scores with shape docs x variants (e.g. the leave-one-out scores), docs in file order.
+    doc_dates (array-like): Date of each document.
+    market_df (pd.DataFrame): Market data with a 'Date' column, as returned by regression_analysis.load_market_data.
+    market_vars (list): Market variables to regress on.
+    window (int): Number of market days of the cumulative market change.
+
+    Returns:
+    pd.DataFrame: R² with shape variants x market variables.
+    """
+    # Imported here so the ablation itself does not pull in the plotting/regression stack
+    from regression_analysis import forward_cumulative_change
+
+    score_matrix = np.asarray(score_matrix, dtype=np.float64)
+
+    # Percentage change of every score column; inf (division by a zero score) is dropped like NaN
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x = score_matrix[1:] / score_matrix[:-1] - 1
+
+    r_squared = {}
+    for market_var in market_vars:
+        # Sum of the market variable over the first `window` market days on or after each document date
+        y = forward_cumulative_change(doc_dates, market_df['Date'], market_df[market_var], window)[1:, None]
+
+        # Simple OLS R² is the squared correlation over the valid rows of each column
+        valid = np.isfinite(x) & np.isfinite(y)
+        n = valid.sum(axis=0)
+        xv = np.where(valid, x, 0.0)
+        yv = np.where(valid, y, 0.0)
+        sx, sy = xv.sum(axis=0), yv.sum(axis=0)
+        sxx, syy, sxy = (xv * xv).sum(axis=0), (yv * yv).sum(axis=0), (xv * yv).sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r_squared[market_var] = (n * sxy - sx * sy) ** 2 / ((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+
+    return pd.DataFrame(r_squared)
+
+
+def dictionary_ablation(dictionary_path, text_files_dir, market_df=None, market_vars=(), window=5, cache=None, n_jobs=1, engine='split') -> pd.DataFrame:
+    """
+    Leave-one-word-out ablation of a dictionary on a corpus, from a single count matrix: the
+    contribution table of every word and, if market data is given, the change in the R² of each
+    market regression when the word is dropped (positive = the word helps the regression).
+
+    Args:
+    dictionary_path (str): Path to the dictionary file containing hawkish/dovish words.
+    text_files_dir (str): Directory containing text files to analyze (file names must contain dates for the R²).
+    market_df (pd.DataFrame, optional): Market data, as returned by regression_analysis.load_market_data.
+    market_vars (list): Market variables to regress on.
+    window (int): Number of market days of the cumulative market change.
+    cache (TokenCountCache, optional): Token count cache to avoid re-reading unchanged files.
+    n_jobs (int): Number of worker processes used to read and tokenize the corpus (1 = serial).
+    engine (str): 'split' (whitespace tokens) or 'phrase' (punctuation-normalized, multi-word aware).
+
+    Returns:
+    pd.DataFrame: One row per dictionary word with its contributions and, per market variable,
+                  R2_Without_<var> and Delta_R2_<var> columns.
+    """
+    words_list = load_dictionary(dictionary_path)
+    count_matrix, total_word_count, txt_files = build_count_matrix(words_list, text_files_dir, cache, n_jobs, engine)
+
+    ablation_df = word_contribution_table(words_list, count_matrix, total_word_count)
+
+    if market_df is not None and len(market_vars):
+        # Imported here so the ablation does not pull in the plotting/regression stack of results.py
+        from results import extract_date_from_filename
+
+        full_scores, loo_scores = leave_one_out_scores(count_matrix, total_word_count)
+        doc_dates = [extract_date_from_filename(f) for f in txt_files]
+
+        # Column 0 is the full dictionary, the others leave one word out each
+        r_squared = leave_one_out_r_squared(np.column_stack([full_scores, loo_scores]), doc_dates,
+                                            market_df, market_vars, window)
+        for market_var in market_vars:
+            ablation_df[f'R2_Without_{market_var}'] = r_squared[market_var].values[1:]
+            ablation_df[f'Delta_R2_{market_var}'] = r_squared[market_var].values[0] - r_squared[market_var].values[1:]
+
+    return ablation_df
+
+
+if __name__ == "__main__":
+    from regression_analysis import load_market_data, market_vars
+
+    # Ablation of the hawkish_gpt_dict2.txt dictionary on every corpus
+    dictionary_path = 'data/processed/hawkish_gpt_dict2.txt'
+    corpora = {
+        'Fed-chair-press-conf': 'data/raw/fomc_press_conf/texts',
+        'FOMC-meeting-minutes': 'data/raw/FOMC/meeting_minutes',
+        'FOMC-statements': 'data/raw/FOMC/statements',
+        'Fed-speeches': 'data/raw/fed_speeches',
+    }
+
+    mkt_data = load_market_data('data/raw/FOMC_Data_2011_2024.xlsx', 'data/processed')
+
+    os.makedirs('data/results', exist_ok=True)
+    for corpus_name, text_files_dir in corpora.items():
+        ablation_df = dictionary_ablation(dictionary_path, text_files_dir, mkt_data, market_vars)
+        ablation_df.to_csv(f'data/results/ablation-hdict2_{corpus_name}.csv', index=False)
+
+        print(f"\n{corpus_name}: top contributing words")
+        print(ablation_df.sort_values('Total_Contribution', ascending=False).head(10))
@@ -1,407 +1,622 @@
 import os
 import pandas as pd
-from collections import Counter
+import numpy as np
+from scipy import sparse
 import math
-import warnings
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from token_cache import TokenCountCache, count_tokens
+from phrase_matcher import PhraseMatcher
+from FOMC_minutes_statements_processing import stream_cleaned_documents
+from corpus_store import CorpusStore, store_exists
 
-def get_hawkish_dovish_score(dictionary_path, text_files_dir, hawk_or_dove:str) -> pd.DataFrame:
+# Counting engines: whitespace tokens looked up in a Counter, or the compiled phrase matcher
+ENGINES = ('split', 'phrase')
+
+
+def load_dictionary(dictionary_path) -> list:
     """
-    Calculate hawkish/dovish word scores for text documents using a provided word dictionary.
-    
+    Load the hawkish/dovish words from a dictionary file, one word per line.
+
     Args:
     dictionary_path (str): Path to the dictionary file containing hawkish/dovish words.
-    text_files_dir (str): Directory containing text files to analyze.
 
     Returns:
-    pd.DataFrame: DataFrame containing the weighted hawkish/dovish word score for each document.
+    list: The dictionary words, in file order.
     """
-    
-    # Load the hawkish/dovish words from the dictionary file into a list
     with open(dictionary_path, 'r') as file:
-        words_list = [line.strip() for line in file.readlines()]
+        return [line.strip() for line in file.readlines()]
 
-    # Initialize a dictionary to store hawkish/dovish word counts for each document
-    word_counts = {word: [] for word in words_list}
 
-    # List to store total word count for each document
-    total_word_count = []
+def _count_text(text, lowered_words, matcher=None):
+    """
+    Count the dictionary entries of one document's text.
 
-    # Get all .txt files in the specified directory
-    txt_files = [f for f in os.listdir(text_files_dir) if f.endswith('.txt')]
+    Args:
+    text (str): Raw document text.
+    lowered_words (list): Lower-cased dictionary words (one column per entry).
+    matcher (PhraseMatcher, optional): Compiled matcher for the 'phrase' engine; whitespace
+        tokens are looked up in a Counter if omitted.
 
-    # Count occurrences of each hawkish/dovish word in each document and compute total word count
-    for txt_file in txt_files:
-        with open(os.path.join(text_files_dir, txt_file), 'r', encoding='utf-8') as file:
-            text = file.read().lower()  # Convert text to lowercase
+    Returns:
+    tuple: (count of each dictionary entry, total word count of the document)
+    """
+    if matcher is not None:
+        return matcher.count_text(text)
+    word_counter, total_words = count_tokens(text)  # Lowercase and tokenize
+    return [word_counter.get(word, 0) for word in lowered_words], total_words
 
-        word_counter = Counter(text.split())
-        
-        # Append total word count for the current document
-        total_word_count.append(len(text.split()))
 
-        # Count occurrences of each hawkish/dovish word and store in word_counts
-        for word in words_list:
-            word_counts[word].append(word_counter.get(word.lower(), 0))
+def _count_files(text_files_dir, txt_files, lowered_words, cache=None, engine='split'):
+    """
+    Count the dictionary words of a shard of documents (runs in a worker process in parallel mode).
 
-    # Create a DataFrame with hawkish/dovish word counts for each document
-    count_matrix_df = pd.DataFrame(word_counts, index=txt_files)
+    Args:
+    text_files_dir (str): Directory containing the text files.
+    txt_files (list): File names of the shard, in row order.
+    lowered_words (list): Lower-cased dictionary words (one column per entry).
+    cache (TokenCountCache, optional): Token count cache (serial 'split' engine only).
+    engine (str): 'split' or 'phrase', see build_count_matrix.
 
-    # Create a DataFrame for total word counts in each document
-    stats_df = pd.DataFrame({'Total_Words': total_word_count}, index=txt_files)
+    Returns:
+    tuple: Compact CSR components of the shard (indptr, column indices, counts) and the
+           np.ndarray of total word counts per document.
+    """
+    indptr = np.zeros(len(txt_files) + 1, dtype=np.int64)
+    cols, counts = [], []
+    total_word_count = np.zeros(len(txt_files), dtype=np.int64)
+    matcher = PhraseMatcher(lowered_words) if engine == 'phrase' else None
+
+    for i, txt_file in enumerate(txt_files):
+        file_path = os.path.join(text_files_dir, txt_file)
+        if cache is not None:
+            word_counter, total_word_count[i] = cache.get_token_counts(file_path)
+            entry_counts = [word_counter.get(word, 0) for word in lowered_words]
+        else:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                entry_counts, total_word_count[i] = _count_text(file.read(), lowered_words, matcher)
+
+        # Only the dictionary words that occur in the document are stored
+        for j, count in enumerate(entry_counts):
+            if count:
+                cols.append(j)
+                counts.append(count)
+        indptr[i + 1] = len(cols)
+
+    return indptr, np.asarray(cols, dtype=np.int64), np.asarray(counts, dtype=np.int64), total_word_count
+
+
+def build_count_matrix(words_list, text_files_dir, cache=None, n_jobs=1, engine='split'):
+    """
+    Count occurrences of each dictionary word in every .txt file of a directory.
 
-    # # Save word counts and total word counts to CSV files (optional)
-    # count_matrix_df.to_csv('word_count_matrix.csv')
-    # stats_df.to_csv('file_word_count.csv')
+    Args:
+    words_list (list): Dictionary words (one column per entry).
+    text_files_dir (str): Directory containing text files to analyze.
+    cache (TokenCountCache, optional): Token count cache; unchanged files are then not read at all.
+    n_jobs (int): Number of worker processes the files are sharded across (1 = serial).
+    engine (str): 'split' looks up whitespace tokens, so only single words with no attached
+        punctuation match. 'phrase' uses the compiled PhraseMatcher, which strips punctuation
+        and also counts multi-word entries; the total word count is then the number of
+        normalized words.
 
-    # Display the total word counts DataFrame
-    # print(stats_df.head())
+    Returns:
+    tuple: (scipy.sparse.csr_matrix of word counts with shape docs x words,
+            np.ndarray of total word counts per document,
+            list of the .txt file names in row order)
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
+    if cache is not None and (n_jobs > 1 or engine != 'split'):
+        raise ValueError("A token count cache can only be used with n_jobs=1 and the 'split' engine")
+
+    # Lower-case once so that the per-document lookups are plain dict gets
+    lowered_words = [word.lower() for word in words_list]
+
+    # Get all .txt files in the specified directory, in deterministic filename order
+    txt_files = sorted(f for f in os.listdir(text_files_dir) if f.endswith('.txt'))
+
+    if n_jobs > 1 and len(txt_files) > 1:
+        # Contiguous shards, several per worker to balance uneven document lengths
+        bounds = np.linspace(0, len(txt_files), min(len(txt_files), n_jobs * 4) + 1).astype(int)
+        shards = [txt_files[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            # map returns the shards in submission order, i.e. filename order
+            results = list(executor.map(_count_files, repeat(text_files_dir), shards, repeat(lowered_words),
+                                        repeat(None), repeat(engine)))
+    else:
+        results = [_count_files(text_files_dir, txt_files, lowered_words, cache, engine)]
+        if cache is not None:
+            cache.save()
+
+    # Stitch the shards back together, offsetting each shard's row pointers
+    offsets = np.cumsum([0] + [len(cols) for _, cols, _, _ in results[:-1]])
+    indptr = np.concatenate([[0]] + [shard_indptr[1:] + offset for (shard_indptr, _, _, _), offset in zip(results, offsets)])
+    cols = np.concatenate([cols for _, cols, _, _ in results])
+    counts = np.concatenate([counts for _, _, counts, _ in results])
+    total_word_count = np.concatenate([totals for _, _, _, totals in results])
+
+    count_matrix = sparse.csr_matrix((counts, cols, indptr), shape=(len(txt_files), len(words_list)))
+    return count_matrix, total_word_count, txt_files
+
+
+def build_count_matrix_from_documents(words_list, documents, engine='split'):
+    """
+    Count occurrences of each dictionary word in a stream of documents, e.g. the rows of a
+    cleaned FOMC CSV yielded by FOMC_minutes_statements_processing.stream_cleaned_documents.
+    Each document is counted as it arrives, so only the sparse counts are kept in memory.
 
-    # Suppress FutureWarnings
-    warnings.simplefilter(action='ignore', category=FutureWarning)
+    Args:
+    words_list (list): Dictionary words (one column per entry).
+    documents (iterable): (doc_id, date, text) tuples.
+    engine (str): 'split' (whitespace tokens) or 'phrase' (punctuation-normalized, multi-word aware).
 
-    # Calculate TF-IDF for hawkish/dovish word counts
-    df_tf_idf = count_matrix_df.copy()
-    df_i = [0] * count_matrix_df.shape[1]
+    Returns:
+    tuple: (scipy.sparse.csr_matrix of word counts with shape docs x words,
+            np.ndarray of total word counts per document,
+            list of the document ids in row order,
+            list of the document dates in row order)
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}, expected one of {ENGINES}")
 
-    for i in range(df_tf_idf.shape[0]):  # Iterate over documents
-        for j in range(df_tf_idf.shape[1]):  # Iterate over words
-            if df_tf_idf.iloc[i, j]:
-                # Apply TF-IDF formula
-                df_tf_idf.iloc[i, j] = (1 + math.log(df_tf_idf.iloc[i, j])) / (1 + math.log(stats_df['Total_Words'][i]))
-                df_i[j] += 1
+    lowered_words = [word.lower() for word in words_list]
+    matcher = PhraseMatcher(lowered_words) if engine == 'phrase' else None
 
-    # Calculate IDF for each word
-    df_i = [math.log(df_tf_idf.shape[0] / i) if i else 0 for i in df_i]
-    df_tf_idf = df_tf_idf.mul(df_i, axis=1)
+    indptr, cols, counts, total_word_count = [0], [], [], []
+    doc_ids, dates = [], []
 
-    # Display the TF-IDF matrix for the first 5 documents
-    # print(df_tf_idf.head(5))
-    # print(df_tf_idf.shape)
+    for doc_id, date, text in documents:
+        entry_counts, total_words = _count_text(text, lowered_words, matcher)
 
-    # Weighting: Multiply TF-IDF by word counts to calculate weighted hawkish/dovish word scores
-    weighted_counts = df_tf_idf * count_matrix_df
+        # Only the dictionary words that occur in the document are stored
+        for j, count in enumerate(entry_counts):
+            if count:
+                cols.append(j)
+                counts.append(count)
+        indptr.append(len(cols))
+        total_word_count.append(total_words)
+        doc_ids.append(doc_id)
+        dates.append(date)
 
-    # Sum the weighted scores for each document
-    weighted_sum = weighted_counts.sum(axis=1)
+    count_matrix = sparse.csr_matrix(
+        (np.asarray(counts, dtype=np.int64), np.asarray(cols, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(doc_ids), len(words_list)),
+    )
+    return count_matrix, np.asarray(total_word_count, dtype=np.int64), doc_ids, dates
 
-    # Create a DataFrame to store the final weighted hawkish/dovish score
-    weighted_sum_df = pd.DataFrame(weighted_sum, columns=[f'Weighted_{hawk_or_dove}ish_Sum'])
 
-    # Return the DataFrame containing the weighted hawkish/dovish scores
-    return weighted_sum_df
+def _exact_log(values) -> np.ndarray:
+    """
+    Element-wise natural log that is bit-for-bit identical to math.log.
 
+    np.log may differ from math.log in the last ulp, so math.log is applied to the
+    distinct values only (word counts and document lengths repeat heavily) and
+    broadcast back to the input shape.
+    """
+    unique_values, inverse = np.unique(values, return_inverse=True)
+    unique_logs = np.fromiter((math.log(v) for v in unique_values), dtype=np.float64, count=len(unique_values))
+    return unique_logs[inverse]
 
 
+def compute_idf(doc_freq, n_docs) -> np.ndarray:
+    """
+    Compute the IDF of each word, log(N / df), with 0 for words that occur in no document.
 
-def get_hawkish_dovish_composite_score(hawk_dictionary_path, dov_dictionary_path, text_files_dir) -> pd.DataFrame:
+    Args:
+    doc_freq (array-like): Number of documents each word occurs in.
+    n_docs (int): Number of documents in the corpus.
+
+    Returns:
+    np.ndarray: The IDF of each word.
+    """
+    doc_freq = np.asarray(doc_freq)
+    idf = np.zeros(len(doc_freq), dtype=np.float64)
+    occurring = doc_freq > 0
+    idf[occurring] = [math.log(n_docs / i) for i in doc_freq[occurring]]
+    return idf
+
+
+def _log_tf(count_matrix, total_word_count):
+    """
+    Log-normalised term frequency of every stored (non-zero) count of a count matrix.
+
+    Returns:
+    tuple: (canonical CSR count matrix, row index of every stored count,
+            stored counts as floats, their (1 + log(c)) / (1 + log(T)) term frequencies)
+    """
+    count_matrix = sparse.csr_matrix(count_matrix)
+    count_matrix.eliminate_zeros()
+    count_matrix.sort_indices()
+
+    # Row index of every stored (non-zero) count
+    rows = np.repeat(np.arange(count_matrix.shape[0]), np.diff(count_matrix.indptr))
+    counts = count_matrix.data.astype(np.float64)
+    total_word_count = np.asarray(total_word_count, dtype=np.float64)
+
+    # Log-normalised term frequency, only defined where the word occurs
+    tf = (1 + _exact_log(counts)) / (1 + _exact_log(total_word_count[rows]))
+    return count_matrix, rows, counts, tf
+
+
+def compute_weighted_contributions(count_matrix, total_word_count, idf=None) -> sparse.csr_matrix:
+    """
+    Compute the contribution of every dictionary word to every document's weighted TF-IDF score.
+
+    For a word with count c > 0 in a document with T words, among N documents of which
+    df contain the word, the contribution is:
+        (1 + log(c)) / (1 + log(T)) * log(N / df) * c
+
+    Args:
+    count_matrix (scipy.sparse matrix): Word counts with shape docs x words.
+    total_word_count (array-like): Total word count of each document.
+    idf (np.ndarray, optional): Precomputed IDF of each word; computed from count_matrix if omitted.
+
+    Returns:
+    scipy.sparse.csr_matrix: Weighted contributions with shape docs x words, stored where the word occurs.
+    """
+    count_matrix, rows, counts, tf = _log_tf(count_matrix, total_word_count)
+    n_docs, n_words = count_matrix.shape
+
+    # Document frequency and IDF for each word
+    if idf is None:
+        idf = compute_idf(np.bincount(count_matrix.indices, minlength=n_words), n_docs)
+
+    # Weighting: multiply TF-IDF by word counts
+    weighted_counts = tf * idf[count_matrix.indices] * counts
+    return sparse.csr_matrix((weighted_counts, count_matrix.indices, count_matrix.indptr), shape=count_matrix.shape)
+
+
+def compute_weighted_scores(count_matrix, total_word_count, idf=None) -> np.ndarray:
+    """
+    Compute the weighted TF-IDF dictionary score of each document with whole-array operations:
+    the sum of the word contributions of `compute_weighted_contributions`.
+
+    Args:
+    count_matrix (scipy.sparse matrix): Word counts with shape docs x words.
+    total_word_count (array-like): Total word count of each document.
+    idf (np.ndarray, optional): Precomputed IDF of each word; computed from count_matrix if omitted.
+
+    Returns:
+    np.ndarray: The weighted hawkish/dovish word score of each document.
+    """
+    contributions = compute_weighted_contributions(count_matrix, total_word_count, idf)
+    n_docs = contributions.shape[0]
+
+    # Sum the contributions per document, in column order
+    rows = np.repeat(np.arange(n_docs), np.diff(contributions.indptr))
+    return np.bincount(rows, weights=contributions.data, minlength=n_docs)
+
+
+def compute_as_of_weighted_scores(count_matrix, total_word_count, dates) -> np.ndarray:
+    """
+    Compute the weighted TF-IDF dictionary score of each document with a point-in-time IDF:
+    N and df only count the documents dated on or before the scored document, so no score
+    depends on documents published after it.
+
+    The whole history is computed in one pass. Stored counts are sorted by (word, date); the
+    position of a document inside its word's date-sorted postings is that word's cumulative
+    document frequency as of the document's date, found for all entries at once with
+    searchsorted.
+
+    Args:
+    count_matrix (scipy.sparse matrix): Word counts with shape docs x words.
+    total_word_count (array-like): Total word count of each document.
+    dates (array-like): Date of each document.
+
+    Returns:
+    np.ndarray: The as-of weighted hawkish/dovish word score of each document.
+    """
+    count_matrix, rows, counts, tf = _log_tf(count_matrix, total_word_count)
+    cols = count_matrix.indices.astype(np.int64)
+
+    # Rank the dates; documents sharing a date are all "on or before" each other
+    unique_dates, date_rank = np.unique(np.asarray(dates), return_inverse=True)
+    n_ranks = len(unique_dates)
+
+    # Cumulative number of documents dated on or before each date
+    n_docs_as_of = np.cumsum(np.bincount(date_rank, minlength=n_ranks))
+
+    # Cumulative document frequency of every stored (document, word) entry
+    entry_rank = date_rank[rows]
+    keys = cols * n_ranks + entry_rank
+    sorted_keys = np.sort(keys)
+    word_start = np.searchsorted(sorted_keys, cols * n_ranks, side='left')
+    doc_freq_as_of = np.searchsorted(sorted_keys, keys, side='right') - word_start
+
+    # Point-in-time IDF of every entry; the document itself guarantees df >= 1
+    idf = _exact_log(n_docs_as_of[entry_rank] / doc_freq_as_of)
+
+    # Weighting: multiply TF-IDF by word counts and sum per document
+    weighted_counts = tf * idf * counts
+    return np.bincount(rows, weights=weighted_counts, minlength=count_matrix.shape[0])
+
+
+def get_hawkish_dovish_score(dictionary_path, text_files_dir, hawk_or_dove:str, cache=None, n_jobs=1, engine='split') -> pd.DataFrame:
     """
     Calculate hawkish/dovish word scores for text documents using a provided word dictionary.
     
     Args:
     dictionary_path (str): Path to the dictionary file containing hawkish/dovish words.
     text_files_dir (str): Directory containing text files to analyze.
+    cache (TokenCountCache, optional): Token count cache to avoid re-reading unchanged files.
+    n_jobs (int): Number of worker processes used to read and tokenize the corpus (1 = serial).
+    engine (str): 'split' (whitespace tokens) or 'phrase' (punctuation-normalized, multi-word aware).
 
     Returns:
     pd.DataFrame: DataFrame containing the weighted hawkish/dovish word score for each document.
     """
-    # Getting Hawkish Score
-
+    
     # Load the hawkish/dovish words from the dictionary file into a list
-    with open(hawk_dictionary_path, 'r') as file:
-        words_list = [line.strip() for line in file.readlines()]
+    words_list = load_dictionary(dictionary_path)
 
-    # Initialize a dictionary to store hawkish/dovish word counts for each document
-    word_counts = {word: [] for word in words_list}
+    # Sparse docs x words count matrix and the total word count of each document
+    count_matrix, total_word_count, txt_files = build_count_matrix(words_list, text_files_dir, cache, n_jobs, engine)
 
-    # List to store total word count for each document
-    total_word_count = []
+    # Weighted TF-IDF sum for each document
+    weighted_sum = compute_weighted_scores(count_matrix, total_word_count)
 
-    # Get all .txt files in the specified directory
-    txt_files = [f for f in os.listdir(text_files_dir) if f.endswith('.txt')]
+    # Create a DataFrame to store the final weighted hawkish/dovish score
+    weighted_sum_df = pd.DataFrame({f'Weighted_{hawk_or_dove}ish_Sum': weighted_sum}, index=txt_files)
 
-    # Count occurrences of each hawkish/dovish word in each document and compute total word count
-    for txt_file in txt_files:
-        with open(os.path.join(text_files_dir, txt_file), 'r', encoding='utf-8') as file:
-            text = file.read().lower()  # Convert text to lowercase
+    # Return the DataFrame containing the weighted hawkish/dovish scores
+    return weighted_sum_df
 
-        word_counter = Counter(text.split())
-        
-        # Append total word count for the current document
-        total_word_count.append(len(text.split()))
 
-        # Count occurrences of each hawkish/dovish word and store in word_counts
-        for word in words_list:
-            word_counts[word].append(word_counter.get(word.lower(), 0))
 
-    # Create a DataFrame with hawkish/dovish word counts for each document
-    count_matrix_df = pd.DataFrame(word_counts, index=txt_files)
 
-    # Create a DataFrame for total word counts in each document
-    stats_df = pd.DataFrame({'Total_Words': total_word_count}, index=txt_files)
+def get_hawkish_dovish_score_as_of(dictionary_path, text_files_dir, hawk_or_dove:str, cache=None, n_jobs=1, engine='split') -> pd.DataFrame:
+    """
+    Calculate look-ahead-free hawkish/dovish word scores for backtesting: each document's IDF
+    only uses documents dated on or before it. Dates are parsed from the file names.
 
-    # # Save word counts and total word counts to CSV files (optional)
-    # count_matrix_df.to_csv('word_count_matrix.csv')
-    # stats_df.to_csv('file_word_count.csv')
+    Args:
+    dictionary_path (str): Path to the dictionary file containing hawkish/dovish words.
+    text_files_dir (str): Directory containing text files to analyze.
+    hawk_or_dove (str): 'Hawk' or 'Dov', used in the score column name.
+    cache (TokenCountCache, optional): Token count cache to avoid re-reading unchanged files.
+    n_jobs (int): Number of worker processes used to read and tokenize the corpus (1 = serial).
+    engine (str): 'split' (whitespace tokens) or 'phrase' (punctuation-normalized, multi-word aware).
 
-    # Display the total word counts DataFrame
-    # print(stats_df.head())
+    Returns:
+    pd.DataFrame: DataFrame containing the as-of weighted hawkish/dovish word score for each document.
+    """
+    # Imported here so the scorer does not pull in the plotting/regression stack of results.py
+    from results import extract_date_from_filename
 
-    # Suppress FutureWarnings
-    warnings.simplefilter(action='ignore', category=FutureWarning)
+    words_list = load_dictionary(dictionary_path)
+    count_matrix, total_word_count, txt_files = build_count_matrix(words_list, text_files_dir, cache, n_jobs, engine)
 
-    # Calculate TF-IDF for hawkish/dovish word counts
-    df_tf_idf = count_matrix_df.copy()
-    df_i = [0] * count_matrix_df.shape[1]
+    dates = pd.DatetimeIndex([extract_date_from_filename(f) for f in txt_files])
+    if dates.hasnans:
+        undated = [f for f, date in zip(txt_files, dates) if pd.isna(date)]
+        raise ValueError(f"Could not extract a date from the file names: {undated}")
 
-    for i in range(df_tf_idf.shape[0]):  # Iterate over documents
-        for j in range(df_tf_idf.shape[1]):  # Iterate over words
-            if df_tf_idf.iloc[i, j]:
-                # Apply TF-IDF formula
-                df_tf_idf.iloc[i, j] = (1 + math.log(df_tf_idf.iloc[i, j])) / (1 + math.log(stats_df['Total_Words'][i]))
-                df_i[j] += 1
+    weighted_sum = compute_as_of_weighted_scores(count_matrix, total_word_count, dates.values)
 
-    # Calculate IDF for each word
-    df_i = [math.log(df_tf_idf.shape[0] / i) if i else 0 for i in df_i]
-    df_tf_idf = df_tf_idf.mul(df_i, axis=1)
+    return pd.DataFrame({f'Weighted_{hawk_or_dove}ish_Sum': weighted_sum}, index=txt_files)
 
-    # Display the TF-IDF matrix for the first 5 documents
-    # print(df_tf_idf.head(5))
-    # print(df_tf_idf.shape)
 
-    # Weighting: Multiply TF-IDF by word counts to calculate weighted hawkish/dovish word scores
-    weighted_counts = df_tf_idf * count_matrix_df
+def get_hawkish_dovish_scores(dictionaries: dict, text_files_dir, composites: dict = None, cache=None, n_jobs=1, engine='split') -> dict:
+    """
+    Calculate the scores of several hawkish/dovish dictionaries (and their composites) in a
+    single pass over the corpus: each document is read and tokenized exactly once.
 
-    # Sum the weighted scores for each document
-    weighted_sum = weighted_counts.sum(axis=1)
+    Args:
+    dictionaries (dict): Maps a label to a (dictionary_path, hawk_or_dove) tuple,
+        e.g. {'hawk_dict2': ('data/processed/hawkish_gpt_dict2.txt', 'Hawk')}.
+    text_files_dir (str): Directory containing text files to analyze.
+    composites (dict, optional): Maps a label to a (hawk_label, dov_label) tuple of
+        labels from `dictionaries` to combine into a composite score.
+    cache (TokenCountCache, optional): Token count cache to avoid re-reading unchanged files.
+    n_jobs (int): Number of worker processes used to read and tokenize the corpus (1 = serial).
+    engine (str): 'split' (whitespace tokens) or 'phrase' (punctuation-normalized, multi-word aware).
 
-    # Create a DataFrame to store the final weighted hawkish/dovish score
-    weighted_sum_df = pd.DataFrame(weighted_sum, columns=[f'Weighted_Hawkish_Sum'])
+    Returns:
+    dict: Maps each dictionary label to the DataFrame `get_hawkish_dovish_score` would return,
+          and each composite label to the DataFrame `get_hawkish_dovish_composite_score` would return.
+    """
+    words_list, column_slices = _concatenate_dictionaries(dictionaries)
 
-    ### Getting the Dovish score
-    # Load the hawkish/dovish words from the dictionary file into a list
-    with open(dov_dictionary_path, 'r') as file:
-        words_list = [line.strip() for line in file.readlines()]
+    # One read + tokenization of the corpus for all dictionaries
+    count_matrix, total_word_count, txt_files = build_count_matrix(words_list, text_files_dir, cache, n_jobs, engine)
 
-    # Initialize a dictionary to store hawkish/dovish word counts for each document
-    word_counts = {word: [] for word in words_list}
+    return _score_dictionaries(dictionaries, column_slices, count_matrix, total_word_count, txt_files, composites)
 
-    # List to store total word count for each document
-    total_word_count = []
 
-    # Get all .txt files in the specified directory
-    txt_files = [f for f in os.listdir(text_files_dir) if f.endswith('.txt')]
+def get_hawkish_dovish_scores_from_documents(dictionaries: dict, documents, composites: dict = None, engine='split') -> dict:
+    """
+    Same as `get_hawkish_dovish_scores`, for a stream of (doc_id, date, text) documents instead
+    of a directory of text files, e.g. FOMC minutes or statements read straight from the
+    cleaned CSVs with FOMC_minutes_statements_processing.stream_cleaned_documents.
 
-    # Count occurrences of each hawkish/dovish word in each document and compute total word count
-    for txt_file in txt_files:
-        with open(os.path.join(text_files_dir, txt_file), 'r', encoding='utf-8') as file:
-            text = file.read().lower()  # Convert text to lowercase
+    Args:
+    dictionaries (dict): Maps a label to a (dictionary_path, hawk_or_dove) tuple.
+    documents (iterable): (doc_id, date, text) tuples; consumed once.
+    composites (dict, optional): Maps a label to a (hawk_label, dov_label) tuple of
+        labels from `dictionaries` to combine into a composite score.
+    engine (str): 'split' (whitespace tokens) or 'phrase' (punctuation-normalized, multi-word aware).
 
-        word_counter = Counter(text.split())
-        
-        # Append total word count for the current document
-        total_word_count.append(len(text.split()))
+    Returns:
+    dict: Maps each dictionary and composite label to its score DataFrame, indexed by doc_id and
+          sorted by it (the filename order of `get_hawkish_dovish_scores`), whatever the stream order.
+    """
+    words_list, column_slices = _concatenate_dictionaries(dictionaries)
 
-        # Count occurrences of each hawkish/dovish word and store in word_counts
-        for word in words_list:
-            word_counts[word].append(word_counter.get(word.lower(), 0))
+    count_matrix, total_word_count, doc_ids, _ = build_count_matrix_from_documents(words_list, documents, engine)
 
-    # Create a DataFrame with hawkish/dovish word counts for each document
-    count_matrix_df = pd.DataFrame(word_counts, index=txt_files)
+    # Scores do not depend on the row order, so sorting the results is exact
+    scores = _score_dictionaries(dictionaries, column_slices, count_matrix, total_word_count, doc_ids, composites)
+    return {label: df.sort_index(kind='stable') for label, df in scores.items()}
 
-    # Create a DataFrame for total word counts in each document
-    stats_df = pd.DataFrame({'Total_Words': total_word_count}, index=txt_files)
 
-    # # Save word counts and total word counts to CSV files (optional)
-    # count_matrix_df.to_csv('word_count_matrix.csv')
-    # stats_df.to_csv('file_word_count.csv')
+def get_hawkish_dovish_scores_from_store(dictionaries: dict, store_path, composites: dict = None, engine='split') -> dict:
+    """
+    Same as `get_hawkish_dovish_scores`, for a packed corpus store (see corpus_store.py) instead
+    of a directory of text files: the whole corpus is read through one memory-mapped file.
 
-    # Display the total word counts DataFrame
-    # print(stats_df.head())
+    Args:
+    dictionaries (dict): Maps a label to a (dictionary_path, hawk_or_dove) tuple.
+    store_path (str): Path prefix of the corpus store.
+    composites (dict, optional): Maps a label to a (hawk_label, dov_label) tuple of
+        labels from `dictionaries` to combine into a composite score.
+    engine (str): 'split' (whitespace tokens) or 'phrase' (punctuation-normalized, multi-word aware).
 
-    # Suppress FutureWarnings
-    warnings.simplefilter(action='ignore', category=FutureWarning)
+    Returns:
+    dict: Maps each dictionary and composite label to its score DataFrame, indexed by doc_id.
+    """
+    with CorpusStore(store_path) as store:
+        return get_hawkish_dovish_scores_from_documents(dictionaries, store.iter_documents(), composites, engine)
 
-    # Calculate TF-IDF for hawkish/dovish word counts
-    df_tf_idf = count_matrix_df.copy()
-    df_i = [0] * count_matrix_df.shape[1]
 
-    for i in range(df_tf_idf.shape[0]):  # Iterate over documents
-        for j in range(df_tf_idf.shape[1]):  # Iterate over words
-            if df_tf_idf.iloc[i, j]:
-                # Apply TF-IDF formula
-                df_tf_idf.iloc[i, j] = (1 + math.log(df_tf_idf.iloc[i, j])) / (1 + math.log(stats_df['Total_Words'][i]))
-                df_i[j] += 1
+def _concatenate_dictionaries(dictionaries: dict):
+    """
+    Concatenate all dictionaries into one list of columns, remembering each dictionary's slice.
+    """
+    words_list = []
+    column_slices = {}
+    for label, (dictionary_path, _) in dictionaries.items():
+        dictionary_words = load_dictionary(dictionary_path)
+        column_slices[label] = slice(len(words_list), len(words_list) + len(dictionary_words))
+        words_list.extend(dictionary_words)
+    return words_list, column_slices
 
-    # Calculate IDF for each word
-    df_i = [math.log(df_tf_idf.shape[0] / i) if i else 0 for i in df_i]
-    df_tf_idf = df_tf_idf.mul(df_i, axis=1)
 
-    # Display the TF-IDF matrix for the first 5 documents
-    # print(df_tf_idf.head(5))
-    # print(df_tf_idf.shape)
+def _score_dictionaries(dictionaries: dict, column_slices: dict, count_matrix, total_word_count, doc_ids, composites: dict = None) -> dict:
+    """
+    Score each dictionary's column slice of a shared count matrix, then the composites.
+    """
+    # IDF is per word, so scoring each dictionary's columns separately is exact
+    scores = {}
+    for label, (_, hawk_or_dove) in dictionaries.items():
+        weighted_sum = compute_weighted_scores(count_matrix[:, column_slices[label]], total_word_count)
+        scores[label] = pd.DataFrame({f'Weighted_{hawk_or_dove}ish_Sum': weighted_sum}, index=doc_ids)
 
-    # Weighting: Multiply TF-IDF by word counts to calculate weighted hawkish/dovish word scores
-    weighted_counts_dov = df_tf_idf * count_matrix_df
+    for label, (hawk_label, dov_label) in (composites or {}).items():
+        scores[label] = _composite_score(scores[hawk_label], scores[dov_label])
 
-    # Sum the weighted scores for each document
-    weighted_sum_dov = weighted_counts_dov.sum(axis=1)
+    return scores
 
-    # Create a DataFrame to store the final weighted hawkish/dovish score
-    weighted_sum_dov_df = pd.DataFrame(weighted_sum_dov, columns=[f'Weighted_Dovish_Sum'])
 
+def _composite_score(hawkish_df, dovish_df) -> pd.DataFrame:
+    """
+    Combine a hawkish and a dovish score DataFrame into the composite score DataFrame.
+    """
     # Merge the hawkish and dovish DataFrames
-    final_df = pd.concat([weighted_sum_df, weighted_sum_dov_df], axis=1)
+    final_df = pd.concat([hawkish_df.iloc[:, 0].rename('Weighted_Hawkish_Sum'),
+                          dovish_df.iloc[:, 0].rename('Weighted_Dovish_Sum')], axis=1)
 
     # Calculate Composite_Score and Composite_Score_Abs
     final_df['Composite_Score'] = (final_df['Weighted_Hawkish_Sum'] - final_df['Weighted_Dovish_Sum']) / (final_df['Weighted_Hawkish_Sum'] + final_df['Weighted_Dovish_Sum'])
     final_df['Composite_Score_Abs'] = final_df['Weighted_Hawkish_Sum'] - final_df['Weighted_Dovish_Sum']
 
-    # Return the merged DataFrame containing both hawkish and dovish scores
     return final_df
 
 
+def get_hawkish_dovish_composite_score(hawk_dictionary_path, dov_dictionary_path, text_files_dir, cache=None, n_jobs=1, engine='split') -> pd.DataFrame:
+    """
+    Calculate hawkish, dovish and composite word scores for text documents in a single pass over the corpus.
+    
+    Args:
+    hawk_dictionary_path (str): Path to the dictionary file containing hawkish words.
+    dov_dictionary_path (str): Path to the dictionary file containing dovish words.
+    text_files_dir (str): Directory containing text files to analyze.
+    cache (TokenCountCache, optional): Token count cache to avoid re-reading unchanged files.
+    n_jobs (int): Number of worker processes used to read and tokenize the corpus (1 = serial).
+    engine (str): 'split' (whitespace tokens) or 'phrase' (punctuation-normalized, multi-word aware).
+
+    Returns:
+    pd.DataFrame: DataFrame containing the weighted hawkish and dovish word scores and the composite scores for each document.
+    """
+    scores = get_hawkish_dovish_scores(
+        {'hawk': (hawk_dictionary_path, 'Hawk'), 'dov': (dov_dictionary_path, 'Dov')},
+        text_files_dir,
+        composites={'composite': ('hawk', 'dov')},
+        cache=cache,
+        n_jobs=n_jobs,
+        engine=engine,
+    )
+
+    # Return the merged DataFrame containing both hawkish and dovish scores
+    return scores['composite']
+
+
 if __name__ == "__main__":
-    ### Getting the hawkish score for all the fed documents
-    ### using the hawkish_gpt_dict.txt
-    print("Hawkish Scores for Fed Chair Press Conferences")
-    df = get_hawkish_dovish_score('data/processed/hawkish_gpt_dict.txt','data/raw/fomc_press_conf/texts', 'Hawk') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-hawkish-scored_Fed-chair-press-conf.csv')
-
-    print("\n*****************************************\n")
-    print("Hawkish Scores for FOMC Meeting Minutes")
-    df = get_hawkish_dovish_score('data/processed/hawkish_gpt_dict.txt','data/raw/FOMC/meeting_minutes', 'Hawk') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-hawkish-scored_FOMC-meeting-minutes.csv')
-    print("\n*****************************************\n")
-
-
-    print("\n*****************************************\n")
-    print("Hawkish Scores for FOMC Statements")
-    df = get_hawkish_dovish_score('data/processed/hawkish_gpt_dict.txt','data/raw/FOMC/statements', 'Hawk') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-hawkish-scored_FOMC-statements.csv')
-    print("\n*****************************************\n")
-
-
-    print("\n*****************************************\n")
-    print("Hawkish Scores for Fed Speeches")
-    df = get_hawkish_dovish_score('data/processed/hawkish_gpt_dict.txt','data/raw/fed_speeches', 'Hawk') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-hawkish-scored_Fed-speeches.csv')
-    print("\n*****************************************\n")
-
-
-    ### Getting the hawkish score for all the fed documents
-    ### using the hawkish_gpt_dict2.txt
-    print("\n*****************************************\n")
-    print("DICT 2 (new dict) Hawkish Scores 2 for Fed Chair Press Conferences")
-    df = get_hawkish_dovish_score('data/processed/hawkish_gpt_dict2.txt','data/raw/fomc_press_conf/texts', 'Hawk') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-hawkish-scored_Fed-chair-press-conf_hdict2.csv')
-    print("\n*****************************************\n")
-
-    print("\n*****************************************\n")
-    print("Hawkish Scores for FOMC Meeting Minutes")
-    df = get_hawkish_dovish_score('data/processed/hawkish_gpt_dict2.txt','data/raw/FOMC/meeting_minutes', 'Hawk') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-hawkish-scored_FOMC-meeting-minutes_hdict2.csv')
-    print("\n*****************************************\n")
-
-
-    print("\n*****************************************\n")
-    print("Hawkish Scores for FOMC Statements")
-    df = get_hawkish_dovish_score('data/processed/hawkish_gpt_dict2.txt','data/raw/FOMC/statements', 'Hawk') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-hawkish-scored_FOMC-statements_hdict2.csv')
-    print("\n*****************************************\n")
-
-
-    print("\n*****************************************\n")
-    print("Hawkish Scores for Fed Speeches")
-    df = get_hawkish_dovish_score('data/processed/hawkish_gpt_dict2.txt','data/raw/fed_speeches', 'Hawk') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-hawkish-scored_Fed-speeches_hdict2.csv')
-    print("\n*****************************************\n")
-
-
-    ### Getting the dovish score for all the fed documents
-    ### using the dovish_gpt_dict.txt
-    print("\n*****************************************\n")
-    print("DICT 3 (new dict) DOVISH Scores 2 for Fed Chair Press Conferences")
-    df = get_hawkish_dovish_score('data/processed/dovish_gpt_dict.txt','data/raw/fomc_press_conf/texts', 'Dov') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-dovish-scored_Fed-chair-press-conf.csv')
-    print("\n*****************************************\n")
-
-
-    print("\n*****************************************\n")
-    print("DICT 3 (new dict) DOVISH Scores for FOMC Meeting Minutes")
-    df = get_hawkish_dovish_score('data/processed/dovish_gpt_dict.txt','data/raw/FOMC/meeting_minutes', 'Dov') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-dovish-scored_FOMC-meeting-minutes_hdict2.csv')
-    print("\n*****************************************\n")
-
-
-    print("\n*****************************************\n")
-    print("DICT 3 (new dict) DOVISH Scores for FOMC Statements")
-    df = get_hawkish_dovish_score('data/processed/dovish_gpt_dict.txt','data/raw/FOMC/statements', 'Dov') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-dovish-scored_FOMC-statements_hdict2.csv')
-    print("\n*****************************************\n")
-
-
-    print("\n*****************************************\n")
-    print("DICT 3 (new dict) DOVISH Scores for Fed Speeches")
-    df = get_hawkish_dovish_score('data/processed/dovish_gpt_dict.txt','data/raw/fed_speeches', 'Dov') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/dict-dovish-scored_Fed-speeches_hdict2.csv')
-    print("\n*****************************************\n")
-
-    ### Getting the hawkish, dovish, and composite score
-    ### using the hawkish_gpt_dict2.txt and dovish_gpt_dict.txt dicts
-    print("\n*****************************************\n")
-    print("Composite Score for Fed Chair Press Conferences")
-    df = get_hawkish_dovish_composite_score('data/processed/hawkish_gpt_dict2.txt', 'data/processed/dovish_gpt_dict.txt','data/raw/fomc_press_conf/texts') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/composite-scored_Fed-chair-press-conf.csv')
-    print("\n*****************************************\n")
-
-    print("\n*****************************************\n")
-    print("Composite Scores for FOMC Meeting Minutes")
-    df = get_hawkish_dovish_composite_score('data/processed/hawkish_gpt_dict2.txt', 'data/processed/dovish_gpt_dict.txt','data/raw/FOMC/meeting_minutes') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/composite-scored_FOMC-meeting-minutes_hdict2.csv')
-    print("\n*****************************************\n")
-
-
-    print("\n*****************************************\n")
-    print("Composite Score for FOMC Statements")
-    df = get_hawkish_dovish_composite_score('data/processed/hawkish_gpt_dict2.txt', 'data/processed/dovish_gpt_dict.txt','data/raw/FOMC/statements') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/composite-scored_FOMC-statements_hdict2.csv')
-    print("\n*****************************************\n")
-
-
-    print("\n*****************************************\n")
-    print("Composite Score for Fed Speeches")
-    df = get_hawkish_dovish_composite_score('data/processed/hawkish_gpt_dict2.txt', 'data/processed/dovish_gpt_dict.txt','data/raw/fed_speeches') 
-    print(df.head(10))
-    print(df.tail(10))
-    df.to_csv('data/results/composite-scored_Fed-speeches_hdict2.csv')
-    print("\n*****************************************\n")
+    # Dictionaries scored on every corpus: label -> (dictionary path, hawk_or_dove)
+    dictionaries = {
+        'hawk_dict1': ('data/processed/hawkish_gpt_dict.txt', 'Hawk'),
+        'hawk_dict2': ('data/processed/hawkish_gpt_dict2.txt', 'Hawk'),
+        'dov_dict': ('data/processed/dovish_gpt_dict.txt', 'Dov'),
+    }
+
+    # Composite score using the hawkish_gpt_dict2.txt and dovish_gpt_dict.txt dicts
+    composites = {'composite': ('hawk_dict2', 'dov_dict')}
+
+    # Corpus directory and the result file of each score on that corpus
+    corpora = {
+        'Fed Chair Press Conferences': ('data/raw/fomc_press_conf/texts', {
+            'hawk_dict1': 'data/results/dict-hawkish-scored_Fed-chair-press-conf.csv',
+            'hawk_dict2': 'data/results/dict-hawkish-scored_Fed-chair-press-conf_hdict2.csv',
+            'dov_dict': 'data/results/dict-dovish-scored_Fed-chair-press-conf.csv',
+            'composite': 'data/results/composite-scored_Fed-chair-press-conf.csv',
+        }),
+        'FOMC Meeting Minutes': ('data/raw/FOMC/meeting_minutes', {
+            'hawk_dict1': 'data/results/dict-hawkish-scored_FOMC-meeting-minutes.csv',
+            'hawk_dict2': 'data/results/dict-hawkish-scored_FOMC-meeting-minutes_hdict2.csv',
+            'dov_dict': 'data/results/dict-dovish-scored_FOMC-meeting-minutes_hdict2.csv',
+            'composite': 'data/results/composite-scored_FOMC-meeting-minutes_hdict2.csv',
+        }),
+        'FOMC Statements': ('data/raw/FOMC/statements', {
+            'hawk_dict1': 'data/results/dict-hawkish-scored_FOMC-statements.csv',
+            'hawk_dict2': 'data/results/dict-hawkish-scored_FOMC-statements_hdict2.csv',
+            'dov_dict': 'data/results/dict-dovish-scored_FOMC-statements_hdict2.csv',
+            'composite': 'data/results/composite-scored_FOMC-statements_hdict2.csv',
+        }),
+        'Fed Speeches': ('data/raw/fed_speeches', {
+            'hawk_dict1': 'data/results/dict-hawkish-scored_Fed-speeches.csv',
+            'hawk_dict2': 'data/results/dict-hawkish-scored_Fed-speeches_hdict2.csv',
+            'dov_dict': 'data/results/dict-dovish-scored_Fed-speeches_hdict2.csv',
+            'composite': 'data/results/composite-scored_Fed-speeches_hdict2.csv',
+        }),
+    }
+
+    # Source of each corpus, first available wins: the packed corpus store, then (minutes and
+    # statements only) the cleaned CSV streamed row by row, skipping the per-file text dumps of
+    # FOMC_minutes_statements_processing, then the directory of text files. Every source gives
+    # the same documents and the results come out in filename order either way.
+    cleaned_csvs = {
+        'FOMC Meeting Minutes': ('data/processed/cleaned_meeting_minutes.csv', 'Minutes'),
+        'FOMC Statements': ('data/processed/cleaned_statements.csv', 'Statements'),
+    }
+
+    # Packed corpus stores written by the processing and scraper modules
+    corpus_stores = {
+        'Fed Chair Press Conferences': 'data/processed/corpus_store/press_conferences',
+        'FOMC Meeting Minutes': 'data/processed/corpus_store/meeting_minutes',
+        'FOMC Statements': 'data/processed/corpus_store/statements',
+        'Fed Speeches': 'data/processed/corpus_store/fed_speeches',
+    }
+
+    # Token counts of unchanged documents are served from the on-disk cache
+    cache = TokenCountCache()
+
+    ### Getting the hawkish, dovish, and composite scores for all the fed documents,
+    ### reading each corpus once for all the dictionaries
+    for corpus_name, (text_files_dir, output_files) in corpora.items():
+        if store_exists(corpus_stores[corpus_name]):
+            scores = get_hawkish_dovish_scores_from_store(dictionaries, corpus_stores[corpus_name], composites)
+        elif corpus_name in cleaned_csvs and os.path.exists(cleaned_csvs[corpus_name][0]):
+            documents = stream_cleaned_documents(*cleaned_csvs[corpus_name])
+            scores = get_hawkish_dovish_scores_from_documents(dictionaries, documents, composites)
+        else:
+            scores = get_hawkish_dovish_scores(dictionaries, text_files_dir, composites, cache=cache)
+        for label, output_file in output_files.items():
+            print("\n*****************************************\n")
+            print(f"{label} scores for {corpus_name}")
+            df = scores[label]
+            print(df.head(10))
+            print(df.tail(10))
+            df.to_csv(output_file)
+        print("\n*****************************************\n")
+
+    cache.close()
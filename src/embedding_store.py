@@ -0,0 +1,152 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+INDEX_COLUMNS = ['Content_Hash', 'Document_Row', 'Chunk_Start', 'Chunk_Count']
+
+def content_hash(text) -> str:
+    """
+    SHA-256 of a document's text, the key of its vectors in an EmbeddingStore.
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _write_durably(path, write):
+    # Write to a tmp file flushed to disk, then swap it in: the file at `path` is always complete,
+    # even after a kill or a power loss
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as file:
+        write(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+class EmbeddingStore:
+    """
+    On-disk store of FinBERT chunk and document embeddings, keyed by the document content hash.
+
+    Each (model id, preprocessing version) pair gets its own directory, so vectors computed with a
+    different model, preprocessing or chunking are never mixed up. Every `save` appends one
+    segment to the directory:
+        segment-NNNNN.documents.npy  document embeddings (mean of the chunk embeddings), one row per document
+        segment-NNNNN.chunks.npy     chunk embeddings of the segment's documents, back to back
+        segment-NNNNN.index.csv      Content_Hash, Document_Row, Chunk_Start, Chunk_Count (rows within the segment)
+    Existing segments are never rewritten, and a segment only counts once its index is in place,
+    so a save interrupted at any point leaves the earlier segments intact. The .npy files are
+    opened memory-mapped, so looking up or re-scoring the stored documents does not load the
+    whole store. New vectors are kept in memory until `save`.
+    """
+
+    def __init__(self, store_dir='data/cache/embeddings', model_name='yiyanghkust/finbert-tone', preprocessing_version='v1'):
+        self.model_name = model_name
+        self.preprocessing_version = preprocessing_version
+
+        key = hashlib.sha256(f"{model_name}\n{preprocessing_version}".encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(store_dir, key)
+        os.makedirs(self.path, exist_ok=True)
+
+        meta_path = os.path.join(self.path, 'meta.json')
+        if not os.path.exists(meta_path):
+            with open(meta_path, 'w') as file:
+                json.dump({'model_name': model_name, 'preprocessing_version': preprocessing_version}, file)
+
+        self._load()
+
+    def _segment_path(self, segment, kind, extension='npy'):
+        return os.path.join(self.path, f"segment-{segment:05d}.{kind}.{extension}")
+
+    def _load(self):
+        segments = sorted(int(name.split('.')[0][len('segment-'):]) for name in os.listdir(self.path)
+                          if name.startswith('segment-') and name.endswith('.index.csv'))
+
+        # Content hash -> (segment, document row, first chunk row, number of chunks), rows within the segment
+        self._index = {}
+        for segment in segments:
+            index = pd.read_csv(self._segment_path(segment, 'index', 'csv'))
+            for h, d, s, c in zip(index['Content_Hash'], index['Document_Row'], index['Chunk_Start'], index['Chunk_Count']):
+                self._index.setdefault(h, (segment, int(d), int(s), int(c)))
+        self._next_segment = segments[-1] + 1 if segments else 0
+        self._documents = {}
+        self._chunks = {}
+
+        # Vectors added since the last save, the rows of the next segment
+        self._pending_hashes = []
+        self._pending_documents = []
+        self._pending_chunks = []
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, text_hash):
+        return text_hash in self._index
+
+    def _segment(self, segment):
+        if segment not in self._documents:
+            self._documents[segment] = np.load(self._segment_path(segment, 'documents'), mmap_mode='r')
+            self._chunks[segment] = np.load(self._segment_path(segment, 'chunks'), mmap_mode='r')
+        return self._documents[segment], self._chunks[segment]
+
+    def get_document_embedding(self, text_hash) -> np.ndarray:
+        """
+        Document embedding of a stored document (1-D vector).
+        """
+        segment, row, _, _ = self._index[text_hash]
+        if segment == self._next_segment:
+            return self._pending_documents[row]
+        return np.asarray(self._segment(segment)[0][row])
+
+    def get_chunk_embeddings(self, text_hash) -> np.ndarray:
+        """
+        Chunk embeddings of a stored document, one row per chunk.
+        """
+        segment, row, chunk_start, chunk_count = self._index[text_hash]
+        if segment == self._next_segment:
+            return self._pending_chunks[row]
+        return np.asarray(self._segment(segment)[1][chunk_start:chunk_start + chunk_count])
+
+    def get_document_embeddings(self, text_hashes) -> np.ndarray:
+        """
+        Document embeddings of several stored documents, one row per hash.
+        """
+        return np.vstack([self.get_document_embedding(text_hash) for text_hash in text_hashes])
+
+    def add(self, text_hash, chunk_embeddings):
+        """
+        Store the chunk embeddings of a document; its document embedding is their mean.
+
+        Args:
+        text_hash (str): Content hash of the document (see content_hash).
+        chunk_embeddings (np.ndarray): Chunk embeddings with shape chunks x hidden size.
+        """
+        if text_hash in self._index:
+            return
+        chunk_embeddings = np.asarray(chunk_embeddings, dtype=np.float32)
+        self._index[text_hash] = (self._next_segment, len(self._pending_documents),
+                                  sum(len(chunks) for chunks in self._pending_chunks), len(chunk_embeddings))
+        self._pending_hashes.append(text_hash)
+        self._pending_documents.append(chunk_embeddings.mean(axis=0))
+        self._pending_chunks.append(chunk_embeddings)
+
+    def save(self):
+        """
+        Write the vectors added since the last save as a new segment. Only the new vectors are
+        written, so the cost of a save does not grow with the size of the store.
+        """
+        if not self._pending_documents:
+            return
+
+        segment = self._next_segment
+        for kind, array in [('documents', np.vstack(self._pending_documents)), ('chunks', np.vstack(self._pending_chunks))]:
+            _write_durably(self._segment_path(segment, kind), lambda file, array=array: np.save(file, array))
+
+        # The index goes last: it is what makes the segment part of the store
+        index = pd.DataFrame([(h,) + self._index[h][1:] for h in self._pending_hashes], columns=INDEX_COLUMNS)
+        _write_durably(self._segment_path(segment, 'index', 'csv'), lambda file: index.to_csv(file, index=False))
+
+        self._next_segment += 1
+        self._pending_hashes = []
+        self._pending_documents = []
+        self._pending_chunks = []
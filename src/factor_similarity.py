@@ -1,11 +1,188 @@
+import os
+import time
+import hashlib
+import inspect
+import multiprocessing
+from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from transformers import BertTokenizer, BertModel
-from sklearn.metrics.pairwise import cosine_similarity
+from corpus_store import CorpusStore, store_exists, pack_directory
+from embedding_store import EmbeddingStore, content_hash
+from token_shards import TokenShardStore
+from text_normalization import NORMALIZER_VERSION, finbert_normalizer
 
-# Load pre-trained FinBERT model and tokenizer
-tokenizer = BertTokenizer.from_pretrained('yiyanghkust/finbert-tone')
-model = BertModel.from_pretrained('yiyanghkust/finbert-tone')
+# Pre-trained FinBERT model and tokenizer, loaded on first use by load_finbert.
+# torch, transformers, sklearn and nltk are imported lazily too, so importing this module
+# for the sentence lists or preprocessing is fast and needs no network.
+MODEL_NAME = 'yiyanghkust/finbert-tone'
+_finbert = None
+
+# Text preprocessing before FinBERT: the original NLTK word_tokenize path (default) or the shared
+# fast normalizer (text_normalization.py). The fast normalizer does not reproduce the NLTK word
+# stream exactly, so it changes the scores and is opt-in (set_preprocessing / FINBERT_PREPROCESSING).
+# Bump an engine's version whenever its preprocessing or the token chunking changes so stored
+# embeddings are not reused
+PREPROCESSING_VERSIONS = {'fast': NORMALIZER_VERSION, 'nltk': 'nltk-lower-nopunct-nostopwords-v1'}
+_preprocessing = os.environ.get('FINBERT_PREPROCESSING', 'nltk')
+
+# Offline mode: only the local Hugging Face / NLTK caches are used, and a missing resource fails fast
+OFFLINE = os.environ.get('HF_HUB_OFFLINE', '0') == '1'
+
+def load_finbert(offline=None):
+    """
+    Loads the FinBERT tokenizer and model once and returns the shared instances.
+
+    Args:
+    offline (bool, optional): Only load from the local Hugging Face cache, raising an OSError right
+        away if the model is not there. Defaults to OFFLINE (the HF_HUB_OFFLINE environment variable).
+
+    Returns:
+    tuple: (BertTokenizerFast, BertModel)
+    """
+    global _finbert
+    if _finbert is None:
+        from transformers import BertTokenizerFast, BertModel
+
+        offline = OFFLINE if offline is None else offline
+        try:
+            # The Rust-backed fast tokenizer: same vocabulary and ids as BertTokenizer, plus word offsets
+            tokenizer = BertTokenizerFast.from_pretrained(MODEL_NAME, local_files_only=offline)
+            model = BertModel.from_pretrained(MODEL_NAME, local_files_only=offline)
+        except OSError as err:
+            if offline:
+                raise OSError(f"{MODEL_NAME} is not in the local Hugging Face cache (offline mode)") from err
+            raise
+        model.eval()
+        _finbert = (tokenizer, model)
+    return _finbert
+
+def __getattr__(name):
+    # Backwards compatible `factor_similarity.tokenizer` / `factor_similarity.model`, loaded on first access
+    if name == 'tokenizer':
+        return load_finbert()[0]
+    if name == 'model':
+        return load_finbert()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Inference backends for the FinBERT forward pass: fp32 PyTorch, PyTorch with dynamic INT8
+# quantization of the linear layers, or the fp32 graph exported to ONNX Runtime
+BACKENDS = ('torch', 'torch-int8', 'onnx')
+ONNX_CACHE_DIR = 'data/cache/onnx'
+_backend = os.environ.get('FINBERT_BACKEND', 'torch')
+_backend_runners = {}
+
+def set_backend(backend):
+    """
+    Selects the inference backend used by every embedding function ('torch', 'torch-int8' or 'onnx').
+    """
+    global _backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    _backend = backend
+
+def set_preprocessing(engine):
+    """
+    Selects the text preprocessing applied before FinBERT ('nltk', the default, or 'fast').
+    """
+    global _preprocessing
+    if engine not in PREPROCESSING_VERSIONS:
+        raise ValueError(f"Unknown preprocessing engine {engine!r}, expected one of {tuple(PREPROCESSING_VERSIONS)}")
+    _preprocessing = engine
+
+def get_preprocessing_version():
+    """
+    Version string of the current preprocessing engine, part of the embedding cache keys.
+    """
+    return PREPROCESSING_VERSIONS[_preprocessing]
+
+def get_tokenizer_version():
+    """
+    Identifier of the tokenizer and preprocessing that produce the FinBERT token ids; pre-tokenized
+    shards (see token_shards.py) are keyed by it.
+    """
+    tokenizer, _ = load_finbert()
+    return f"{MODEL_NAME}|{type(tokenizer).__name__}|vocab{len(tokenizer)}|{get_preprocessing_version()}"
+
+def get_model_id():
+    """
+    Identifier of the model as run by the current backend; cached anchor and document embeddings
+    are keyed by it so vectors of different backends are never mixed.
+    """
+    return MODEL_NAME if _backend == 'torch' else f"{MODEL_NAME}+{_backend}"
+
+def _export_onnx(model, onnx_path):
+    import torch
+
+    class _LastHiddenState(torch.nn.Module):
+        # Only the last hidden state is exported, with the padded batch as the single input pair
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+    # Trace with a padded batch so the attention-mask path is part of the graph
+    dummy_ids = torch.ones((2, 8), dtype=torch.long)
+    dummy_mask = torch.tensor([[1] * 8, [1] * 5 + [0] * 3], dtype=torch.long)
+    # Newer torch versions default to the dynamo exporter; the TorchScript one needs no extra packages
+    export_kwargs = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+    # Export next to the cached model and swap it in, so an interrupted export is never reused
+    tmp_path = f"{os.path.splitext(onnx_path)[0]}.tmp.onnx"
+    try:
+        torch.onnx.export(_LastHiddenState(model).eval(), (dummy_ids, dummy_mask), tmp_path, **export_kwargs,
+                          input_names=['input_ids', 'attention_mask'], output_names=['last_hidden_state'],
+                          dynamic_axes={name: {0: 'batch', 1: 'sequence'} for name in ['input_ids', 'attention_mask', 'last_hidden_state']})
+        os.replace(tmp_path, onnx_path)
+    finally:
+        # The exporter can leave the module in training mode, which would enable dropout for the torch backend
+        model.eval()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def _load_backend_runner(backend):
+    """
+    Returns a function mapping (input_ids, attention_mask) tensors to the last hidden state tensor
+    for a backend, building the quantized model or ONNX session on first use.
+    """
+    if backend in _backend_runners:
+        return _backend_runners[backend]
+
+    import torch
+    _, model = load_finbert()
+
+    if backend == 'torch':
+        def runner(input_ids, attention_mask):
+            with torch.inference_mode():
+                return model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+    elif backend == 'torch-int8':
+        quantized_model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        def runner(input_ids, attention_mask):
+            with torch.inference_mode():
+                return quantized_model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+    else:
+        try:
+            import onnxruntime
+        except ImportError as err:
+            raise ImportError("The 'onnx' backend requires the onnxruntime package") from err
+
+        onnx_path = os.path.join(ONNX_CACHE_DIR, MODEL_NAME.replace('/', '--'), 'model.onnx')
+        if not os.path.exists(onnx_path):
+            _export_onnx(model, onnx_path)
+        session = onnxruntime.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+        def runner(input_ids, attention_mask):
+            outputs = session.run(['last_hidden_state'], {'input_ids': input_ids.numpy().astype(np.int64),
+                                                          'attention_mask': attention_mask.numpy().astype(np.int64)})
+            return torch.from_numpy(outputs[0])
+
+    _backend_runners[backend] = runner
+    return runner
+
+# Embeddings of the hawkish/dovish anchor sentences, in memory and on disk
+ANCHOR_CACHE_DIR = 'data/cache/anchor_embeddings'
+_anchor_embeddings = {}
 
 # # Define Hawkish and Dovish sentences
 # HAWKISH_SENTENCES = [
@@ -141,72 +318,800 @@ DOVISH_SENTENCES = [
 ]
 
 import string
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
 
-# Ensure the necessary NLTK packages are downloaded
-nltk.download('punkt_tab')
-nltk.download('stopwords')
+# NLTK tokenizer and English stop words, loaded on first use by load_nltk_resources
+_nltk_resources = None
 
-# Function to preprocess text (removing punctuation, stop words, etc.)
-def preprocess_text(text):
+def load_nltk_resources(offline=None):
+    """
+    Makes sure the NLTK packages used by preprocess_text_nltk are available, downloading them if needed
+    (unless offline, where a missing package raises a LookupError right away).
+
+    Returns:
+    tuple: (word_tokenize function, set of English stop words)
+    """
+    global _nltk_resources
+    if _nltk_resources is None:
+        import nltk
+        from nltk.corpus import stopwords
+        from nltk.tokenize import word_tokenize
+
+        offline = OFFLINE if offline is None else offline
+        for resource, package in [('tokenizers/punkt_tab', 'punkt_tab'), ('corpora/stopwords', 'stopwords')]:
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                if offline:
+                    raise LookupError(f"NLTK package {package!r} is not installed (offline mode)")
+                nltk.download(package)
+
+        _nltk_resources = (word_tokenize, set(stopwords.words('english')))
+    return _nltk_resources
+
+# Function to preprocess text with the original NLTK pipeline (the 'nltk' preprocessing engine)
+def preprocess_text_nltk(text):
     # Convert to lowercase
     text = text.lower()
 
     # Tokenize text into words
+    word_tokenize, stop_words = load_nltk_resources()
     words = word_tokenize(text)
 
     # Remove punctuation
     words = [word for word in words if word not in string.punctuation]
 
     # Remove stopwords
-    stop_words = set(stopwords.words('english'))
     words = [word for word in words if word not in stop_words]
 
     # Join words back into a single string
     return ' '.join(words)
 
+# Function to preprocess text (removing punctuation, stop words, etc.)
+def preprocess_text(text):
+    if _preprocessing == 'nltk':
+        return preprocess_text_nltk(text)
+    # Lower-casing, punctuation and stop word removal in one precompiled pass
+    return finbert_normalizer.normalize(text)
+
+# Function to preprocess many texts at once
+def preprocess_texts(texts):
+    if _preprocessing == 'nltk':
+        return [preprocess_text_nltk(text) for text in texts]
+    return finbert_normalizer.normalize_batch(texts)
+
+# Function to preprocess and tokenize whole documents into FinBERT token ids
+def tokenize_documents(texts):
+    """
+    Preprocesses and tokenizes documents into WordPiece ids, without special tokens or truncation.
+    With the 'fast' preprocessing, the normalized words go to the fast tokenizer already split
+    (is_split_into_words), so the whole batch is tokenized in one call.
+
+    Args:
+    texts (list): The raw document texts.
+
+    Returns:
+    list: One list of token ids per document.
+    """
+    tokenizer, _ = load_finbert()
+    if _preprocessing == 'nltk':
+        return [tokenizer.encode(text, add_special_tokens=False, truncation=False) for text in preprocess_texts(texts)]
+    if not len(texts):
+        return []
+    words = finbert_normalizer.tokens_batch(texts)
+    return tokenizer(words, is_split_into_words=True, add_special_tokens=False, truncation=False)['input_ids']
+
 # Function to generate embeddings from text using FinBERT
 def get_embedding(text):
+    tokenizer, _ = load_finbert()
     inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=512)
-    outputs = model(**inputs)
-    return outputs.last_hidden_state.mean(dim=1).detach().numpy()  # Mean pooling to get single embedding
+    last_hidden_state = _load_backend_runner(_backend)(inputs['input_ids'], inputs['attention_mask'])
+    return last_hidden_state.mean(dim=1).numpy()  # Mean pooling to get single embedding
 
-# Updated function to handle long documents by splitting into chunks
-def get_embedding_for_long_text(text, chunk_size=512):
-    # Preprocess the text
-    preprocessed_text = preprocess_text(text)
+# Function to run FinBERT on a padded batch and mean-pool the real tokens
+def _pooled_embeddings(inputs):
+    hidden_states = _load_backend_runner(_backend)(inputs['input_ids'], inputs['attention_mask'])
+
+    # Attention-mask-aware mean pooling: padding positions are excluded from the average
+    mask = inputs['attention_mask'].unsqueeze(-1).to(hidden_states.dtype)
+    return ((hidden_states * mask).sum(dim=1) / mask.sum(dim=1)).numpy()
+
+# Function to generate embeddings for many texts with padded batches
+def get_embeddings_batched(texts, batch_size=16):
+    """
+    Embeds a list of texts with FinBERT in padded batches of `batch_size` under inference mode.
+    Mean pooling only averages the real tokens of each text (attention mask), so every row equals
+    what `get_embedding` returns for that text on its own.
 
-    # Tokenize the entire preprocessed text
-    tokens = tokenizer.encode(preprocessed_text, truncation=False)  # No truncation
+    Args:
+    texts (list): The texts to embed.
+    batch_size (int): Number of texts per forward pass.
 
-    # Split tokens into chunks of `chunk_size` and gather embeddings for each chunk
+    Returns:
+    numpy.ndarray: The embeddings with shape texts x hidden size.
+    """
+    tokenizer, model = load_finbert()
     embeddings = []
-    for i in range(0, len(tokens), chunk_size):
-        chunk = tokenizer.decode(tokens[i:i+chunk_size], skip_special_tokens=True)
-        chunk_embedding = get_embedding(chunk)
-        embeddings.append(chunk_embedding)
+    for i in range(0, len(texts), batch_size):
+        inputs = tokenizer(texts[i:i + batch_size], return_tensors="pt", truncation=True, padding=True, max_length=512)
+        embeddings.append(_pooled_embeddings(inputs))
+
+    return np.vstack(embeddings) if embeddings else np.zeros((0, model.config.hidden_size), dtype=np.float32)
+
+# Token budget of a batch in the length-bucketed mode: 16 full 512-token chunks, as many short ones as fit
+TOKEN_BUDGET = 8192
+
+# Function to group chunks of token ids into length-bucketed batches under a token budget
+def plan_token_budget_batches(lengths, max_tokens=TOKEN_BUDGET):
+    """
+    Sorts the chunks by token length (longest first) and fills each batch until its padded size,
+    number of chunks x longest chunk, would exceed `max_tokens`. Chunks of similar length end up
+    together, so a batch of short statement chunks is no longer padded to the 512 tokens of a
+    minutes chunk, and short chunks get bigger batches than long ones.
+
+    Args:
+    lengths (list): Number of token ids of each chunk.
+    max_tokens (int): Maximum padded tokens per batch; a chunk longer than the budget gets a batch of its own.
+
+    Returns:
+    list: The batches, as arrays of chunk positions.
+    """
+    order = np.argsort(-np.asarray(lengths, dtype=np.int64), kind='stable')
+
+    batches = []
+    start = 0
+    while start < len(order):
+        # Longest first: the first chunk of the batch sets its padded length
+        batch_size = max(1, max_tokens // int(lengths[order[start]]))
+        batches.append(order[start:start + batch_size])
+        start += batch_size
+    return batches
+
+# Function to measure the padding waste of a batching plan
+def batching_stats(lengths, batches):
+    """
+    Real and padded token counts of a batching plan (lists of chunk positions).
+
+    Returns:
+    dict: Chunks, Batches, Real_Tokens, Padded_Tokens and Padding_Efficiency (real / padded tokens).
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    real_tokens = int(lengths.sum())
+    padded_tokens = int(sum(len(batch) * lengths[batch].max() for batch in batches if len(batch)))
+    return {
+        'Chunks': len(lengths),
+        'Batches': len(batches),
+        'Real_Tokens': real_tokens,
+        'Padded_Tokens': padded_tokens,
+        'Padding_Efficiency': real_tokens / padded_tokens if padded_tokens else 1.0,
+    }
+
+# Function to pick the batches of a run: fixed-size in chunk order, or length-bucketed under a token budget
+def _plan_batches(lengths, batch_size=16, max_tokens=None):
+    if max_tokens is None:
+        return [np.arange(i, min(i + batch_size, len(lengths))) for i in range(0, len(lengths), batch_size)]
+    return plan_token_budget_batches(lengths, max_tokens)
+
+# Function to embed chunks that are already token ids, with padded batches
+def get_embeddings_for_token_chunks(chunks, batch_size=16, max_tokens=None, stats=None):
+    """
+    Embeds chunks of token ids (each already framed by [CLS]/[SEP], see split_into_token_chunks)
+    in padded batches under inference mode, with attention-mask-aware mean pooling. The ids go
+    straight to the model, without being decoded back to text.
+
+    Args:
+    chunks (list): Lists of token ids.
+    batch_size (int): Number of chunks per forward pass (fixed-size batches, in chunk order).
+    max_tokens (int, optional): Token budget per batch; when given, chunks are length-bucketed with
+        plan_token_budget_batches instead of batched `batch_size` at a time.
+    stats (dict, optional): Filled with the batching_stats of the run plus Seconds and Tokens_Per_Second.
+
+    Returns:
+    numpy.ndarray: The embeddings with shape chunks x hidden size, in chunk order.
+    """
+    tokenizer, model = load_finbert()
+    lengths = [len(chunk) for chunk in chunks]
+    batches = _plan_batches(lengths, batch_size, max_tokens)
+
+    start_time = time.perf_counter()
+    embeddings = np.zeros((len(chunks), model.config.hidden_size), dtype=np.float32)
+    for batch in batches:
+        inputs = tokenizer.pad({'input_ids': [chunks[i] for i in batch]}, padding=True, return_tensors="pt")
+        # Scatter back so the rows follow the chunk order whatever the batching
+        embeddings[batch] = _pooled_embeddings(inputs)
+
+    if stats is not None:
+        stats.update(batching_stats(lengths, batches))
+        stats['Seconds'] = time.perf_counter() - start_time
+        stats['Tokens_Per_Second'] = stats['Real_Tokens'] / stats['Seconds'] if stats['Seconds'] else np.nan
+
+    return embeddings
+
+# Function to split a long document into chunks of token ids
+def split_into_token_chunks(text, chunk_size=512, stride=0):
+    """
+    Preprocesses and tokenizes a document once, then slices the token ids into chunks of at most
+    `chunk_size` ids including the [CLS]/[SEP] added around each chunk, so no chunk is truncated
+    by the model's 512-token limit.
+
+    Args:
+    text (str): The raw document text.
+    chunk_size (int): Maximum number of token ids per chunk, special tokens included.
+    stride (int): Number of tokens each chunk shares with the previous one (overlap).
+
+    Returns:
+    list: The chunks, as lists of token ids. An empty document gives a single [CLS] [SEP] chunk.
+    """
+    # Tokenize the entire preprocessed text once, without special tokens or truncation
+    return chunk_token_ids(tokenize_documents([text])[0], chunk_size, stride)
+
+# Start positions of the chunks of a document with n_tokens token ids (without [CLS]/[SEP])
+def _chunk_starts(n_tokens, chunk_size=512, stride=0):
+    body_size = chunk_size - 2
+    if not 0 <= stride < body_size:
+        raise ValueError(f"stride must be in [0, {body_size}) for chunk_size={chunk_size}, got {stride}")
+
+    starts = []
+    for start in range(0, max(n_tokens, 1), body_size - stride):
+        starts.append(start)
+        if start + body_size >= n_tokens:
+            break
+    return starts
+
+# Function to slice the token ids of a document into [CLS]/[SEP]-framed chunks
+def chunk_token_ids(token_ids, chunk_size=512, stride=0):
+    tokenizer, _ = load_finbert()
+    body_size = chunk_size - 2
+    return [[tokenizer.cls_token_id] + token_ids[start:start + body_size] + [tokenizer.sep_token_id]
+            for start in _chunk_starts(len(token_ids), chunk_size, stride)]
+
+# Function to locate the chunks of a document in its original text
+def chunk_passages(text, chunk_size=512, stride=0):
+    """
+    Returns the passage of the original document text each chunk of split_into_token_chunks covers,
+    so a chunk embedding can be shown as readable text. With the 'fast' preprocessing the passages
+    are exact slices of the original text (from the normalizer's word offsets); with 'nltk' they
+    are the decoded chunk tokens (lower-cased, without stop words).
+
+    Returns:
+    list: One (start, end, passage text) tuple per chunk; start/end are character offsets, or -1 with 'nltk'.
+    """
+    tokenizer, _ = load_finbert()
+    body_size = chunk_size - 2
+
+    if _preprocessing == 'nltk':
+        token_ids = tokenize_documents([text])[0]
+        return [(-1, -1, tokenizer.decode(token_ids[start:start + body_size]))
+                for start in _chunk_starts(len(token_ids), chunk_size, stride)]
+
+    words = finbert_normalizer.pre_tokenize_str(text)
+    if not words:
+        return [(0, len(text), text)]
+    encoding = tokenizer([word for word, _ in words], is_split_into_words=True, add_special_tokens=False, truncation=False)
+    word_ids = encoding.word_ids()
+
+    passages = []
+    for start in _chunk_starts(len(word_ids), chunk_size, stride):
+        chunk_word_ids = word_ids[start:start + body_size]
+        char_start, char_end = words[chunk_word_ids[0]][1][0], words[chunk_word_ids[-1]][1][1]
+        passages.append((char_start, char_end, text[char_start:char_end]))
+    return passages
+
+# Updated function to handle long documents by splitting into chunks
+def get_embedding_for_long_text(text, chunk_size=512, batch_size=16, stride=0):
+    # Embed all the token id chunks of the document in padded batches
+    chunk_embeddings = get_embeddings_for_token_chunks(split_into_token_chunks(text, chunk_size, stride), batch_size)
 
     # Average the embeddings across all chunks to get a single embedding for the whole document
-    return np.mean(embeddings, axis=0)
+    return chunk_embeddings.mean(axis=0, keepdims=True)
+
+# Function to open the pre-tokenized shards matching the tokenizer, preprocessing and chunking
+def open_token_shards(shard_dir='data/cache/token_shards', chunk_size=512, stride=0):
+    """
+    Opens the pre-tokenized document shards (see token_shards.py) for the current tokenizer
+    version and the chunking parameters.
+    """
+    return TokenShardStore(shard_dir, get_tokenizer_version(), chunk_size, stride)
+
+# Function to pre-tokenize documents into the token shards
+def build_token_shards(texts, token_shards):
+    """
+    Build step of the pre-tokenized input: preprocesses and tokenizes the documents missing from
+    the shards (once per tokenizer version) and writes their token ids and chunk offsets as a new shard.
+
+    Args:
+    texts (list): The raw document texts.
+    token_shards (TokenShardStore): Shards opened with open_token_shards.
+
+    Returns:
+    int: Number of documents tokenized.
+    """
+    missing = {}
+    for text in texts:
+        text_hash = content_hash(text)
+        if text_hash not in token_shards:
+            missing[text_hash] = text
+    if not missing:
+        return 0
+
+    body_size = token_shards.chunk_size - 2
+    token_ids = tokenize_documents(list(missing.values()))
+    chunk_offsets = [[(start, min(body_size, len(doc_token_ids) - start))
+                      for start in _chunk_starts(len(doc_token_ids), token_shards.chunk_size, token_shards.stride)]
+                     for doc_token_ids in token_ids]
+    return token_shards.add_documents(list(missing), token_ids, chunk_offsets)
+
+# Function to get the [CLS]/[SEP]-framed token id chunks of several documents
+def get_document_chunks(texts, chunk_size=512, stride=0, token_shards=None):
+    """
+    Chunks of token ids of each document (see split_into_token_chunks). Documents found in the
+    pre-tokenized shards are read from them without any preprocessing or tokenization; the
+    others are tokenized here (the shards are not written, see build_token_shards).
+
+    Returns:
+    list: One list of chunks per document.
+    """
+    if token_shards is None:
+        return [chunk_token_ids(token_ids, chunk_size, stride) for token_ids in tokenize_documents(texts)]
+
+    if (token_shards.chunk_size, token_shards.stride) != (chunk_size, stride):
+        raise ValueError(f"Token shards are chunked with chunk_size={token_shards.chunk_size}, stride={token_shards.stride}")
+
+    tokenizer, _ = load_finbert()
+    text_hashes = [content_hash(text) for text in texts]
+    missing = [text for text, text_hash in zip(texts, text_hashes) if text_hash not in token_shards]
+    missing_chunks = iter([chunk_token_ids(token_ids, chunk_size, stride) for token_ids in tokenize_documents(missing)])
+    return [token_shards.get_chunks(text_hash, tokenizer.cls_token_id, tokenizer.sep_token_id)
+            if text_hash in token_shards else next(missing_chunks) for text_hash in text_hashes]
+
+# Function to get the chunk embeddings of several long documents, sharing batches between their chunks
+def get_chunk_embeddings_for_long_texts(texts, chunk_size=512, batch_size=16, stride=0, max_tokens=None, token_shards=None):
+    """
+    Embeds the chunks of several long documents at once: the chunks of all documents go through
+    the model in shared padded batches (length-bucketed across all the documents when `max_tokens`
+    is given, see plan_token_budget_batches). With `token_shards`, the chunks of pre-tokenized
+    documents are read from the shards instead of tokenizing the text.
+
+    Returns:
+    list: One array of chunk embeddings (chunks x hidden size) per document.
+    """
+    chunks = get_document_chunks(texts, chunk_size, stride, token_shards)
+    chunk_embeddings = get_embeddings_for_token_chunks([chunk for doc_chunks in chunks for chunk in doc_chunks], batch_size, max_tokens)
+
+    # Each document's slice of the chunk embeddings
+    bounds = np.cumsum([0] + [len(doc_chunks) for doc_chunks in chunks])
+    return [chunk_embeddings[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+# Function to embed several long documents, sharing batches between their chunks
+def get_embeddings_for_long_texts(texts, chunk_size=512, batch_size=16, stride=0, max_tokens=None):
+    """
+    Embeds several long documents at once: the chunks of all documents go through the model in
+    shared padded batches, then each document's chunk embeddings are averaged.
+
+    Args:
+    texts (list): The raw document texts.
+    chunk_size (int): Maximum number of token ids per chunk, special tokens included.
+    batch_size (int): Number of chunks per forward pass.
+    stride (int): Number of tokens each chunk shares with the previous one (overlap).
+    max_tokens (int, optional): Token budget per length-bucketed batch, instead of `batch_size` chunks per batch.
+
+    Returns:
+    numpy.ndarray: One embedding per document (the row `get_embedding_for_long_text` returns), shape documents x hidden size.
+    """
+    chunk_embeddings = get_chunk_embeddings_for_long_texts(texts, chunk_size, batch_size, stride, max_tokens)
+    return np.vstack([doc_chunk_embeddings.mean(axis=0) for doc_chunk_embeddings in chunk_embeddings])
+
+# Function to embed the chunks of several documents with one batching plan, yielding each document as it completes
+def _iter_document_chunk_embeddings(texts, chunk_size=512, batch_size=16, stride=0, max_tokens=None, token_shards=None):
+    """
+    Embeds the chunks of several documents with a single batching plan over all their chunks, the
+    batches get_chunk_embeddings_for_long_texts would run, and yields the chunk embeddings of each
+    document, in document order, as soon as all its chunks are embedded. The batches are run in
+    the order the documents need them, so the first documents complete early while the length
+    bucketing still spans every document.
+    """
+    tokenizer, model = load_finbert()
+    chunks = get_document_chunks(texts, chunk_size, stride, token_shards)
+    flat_chunks = [chunk for doc_chunks in chunks for chunk in doc_chunks]
+    batches = _plan_batches([len(chunk) for chunk in flat_chunks], batch_size, max_tokens)
+
+    # Batch of every chunk, and each document's slice of the chunks
+    chunk_batch = np.zeros(len(flat_chunks), dtype=np.int64)
+    for b, batch in enumerate(batches):
+        chunk_batch[batch] = b
+    bounds = np.cumsum([0] + [len(doc_chunks) for doc_chunks in chunks])
+
+    embeddings = np.zeros((len(flat_chunks), model.config.hidden_size), dtype=np.float32)
+    batch_done = np.zeros(len(batches), dtype=bool)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        for b in np.unique(chunk_batch[start:end]):
+            if batch_done[b]:
+                continue
+            inputs = tokenizer.pad({'input_ids': [flat_chunks[i] for i in batches[b]]}, padding=True, return_tensors="pt")
+            embeddings[batches[b]] = _pooled_embeddings(inputs)
+            batch_done[b] = True
+        yield embeddings[start:end]
+
+# Worker process setup for the sharded embedding mode: pinned torch threads, model loaded once
+def _init_embedding_worker(n_threads, backend, preprocessing, offline):
+    import torch
+    torch.set_num_threads(n_threads)
+    set_backend(backend)
+    set_preprocessing(preprocessing)
+    load_finbert(offline)
+    _load_backend_runner(backend)
+
+# Function to embed the chunks of many documents shard by shard, optionally across worker processes
+def _iter_chunk_embedding_shards(texts, n_jobs=1, threads_per_job=None, chunk_size=512, batch_size=16, stride=0,
+                                 max_tokens=None, token_shards=None):
+    """
+    Splits the documents into contiguous shards and yields (position of the shard's first document,
+    chunk embeddings of each document of the shard) as the shards complete, in document order.
+    With n_jobs > 1, the shards are embedded by worker processes that pin torch to
+    `threads_per_job` intra-op threads and load the model once.
+    """
+    # One shard in serial mode; several per worker otherwise, to balance uneven document lengths
+    shard_size = max(1, len(texts) if n_jobs <= 1 else -(-len(texts) // (n_jobs * 4)))
+    starts = list(range(0, len(texts), shard_size))
+    shards = [texts[start:start + shard_size] for start in starts]
+
+    if n_jobs <= 1 or len(shards) <= 1:
+        for start, shard in zip(starts, shards):
+            yield start, get_chunk_embeddings_for_long_texts(shard, chunk_size, batch_size, stride, max_tokens, token_shards)
+        return
+
+    threads_per_job = threads_per_job or max(1, (os.cpu_count() or 1) // n_jobs)
+
+    # Spawned workers start from a clean torch state instead of a forked copy of the parent's thread pools
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_embedding_worker, initargs=(threads_per_job, _backend, _preprocessing, OFFLINE)) as executor:
+        # map returns the shards in submission order, i.e. document order
+        yield from zip(starts, executor.map(get_chunk_embeddings_for_long_texts, shards,
+                                            [chunk_size] * len(shards), [batch_size] * len(shards), [stride] * len(shards),
+                                            [max_tokens] * len(shards), [token_shards] * len(shards)))
+
+# Function to embed the chunks of many documents across worker processes
+def get_chunk_embeddings_sharded(texts, n_jobs, threads_per_job=None, chunk_size=512, batch_size=16, stride=0, max_tokens=None,
+                                 token_shards=None):
+    """
+    Sharded execution mode: the documents are split into contiguous shards (several per worker to
+    balance uneven document lengths) and embedded by `n_jobs` worker processes. Each worker pins
+    torch to `threads_per_job` intra-op threads and loads the model once. Results come back in the
+    original document order.
+
+    Args:
+    texts (list): The raw document texts.
+    n_jobs (int): Number of worker processes.
+    threads_per_job (int, optional): Torch threads per worker; defaults to the CPU count divided by n_jobs.
+    token_shards (TokenShardStore, optional): Pre-tokenized shards the workers read the chunks from.
+
+    Returns:
+    list: One array of chunk embeddings (chunks x hidden size) per document.
+    """
+    shards = _iter_chunk_embedding_shards(texts, n_jobs, threads_per_job, chunk_size, batch_size, stride, max_tokens,
+                                          token_shards)
+    return [doc_chunk_embeddings for _, shard_result in shards for doc_chunk_embeddings in shard_result]
+
+# Function to print the progress of a long-running loop
+def _report_progress(label, done, total, start_time):
+    elapsed = time.perf_counter() - start_time
+    rate = done / elapsed if elapsed > 0 else float('inf')
+    eta = (total - done) / rate if rate > 0 else float('nan')
+    eta = str(timedelta(seconds=round(eta))) if np.isfinite(eta) else '?'
+    print(f"{label}: {done}/{total} documents, {rate:.2f} documents/sec, ETA {eta}")
+
+# Function to write a CSV file atomically
+def _write_csv_atomic(df, output_file):
+    # Write next to the target and swap it in, so a killed run never leaves a truncated CSV
+    tmp_path = f"{output_file}.tmp"
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, output_file)
+
+# Function to open the embedding store matching the model, preprocessing and chunking
+def open_embedding_store(store_dir='data/cache/embeddings', chunk_size=512, stride=0):
+    """
+    Opens the on-disk store of document/chunk embeddings (see embedding_store.py) for the model id
+    of the current backend, the preprocessing version and the chunking parameters.
+    """
+    return EmbeddingStore(store_dir, get_model_id(), f"{get_preprocessing_version()}-chunk{chunk_size}-stride{stride}")
+
+# Function to get document embeddings, computing only the ones missing from the embedding store
+def get_document_embeddings(texts, embedding_store=None, chunk_size=512, stride=0, batch_size=16, n_jobs=1, threads_per_job=None,
+                            max_tokens=None, checkpoint_every=None, on_checkpoint=None, token_shards=None):
+    """
+    Returns one embedding per document. With an embedding store, documents whose content is
+    already stored are not run through FinBERT again; the chunk embeddings of the others are
+    computed in shared batches and added to the store (call `embedding_store.save()` to persist).
+
+    Args:
+    texts (list): The raw document texts.
+    embedding_store (EmbeddingStore, optional): Store opened with open_embedding_store using the same chunking.
+    chunk_size (int): Maximum number of token ids per chunk, special tokens included.
+    stride (int): Number of tokens each chunk shares with the previous one (overlap).
+    batch_size (int): Number of chunks per forward pass.
+    n_jobs (int): Number of worker processes the documents are sharded across (1 = serial).
+    threads_per_job (int, optional): Torch threads per worker process.
+    max_tokens (int, optional): Token budget per length-bucketed batch, instead of `batch_size` chunks per batch.
+    checkpoint_every (int, optional): With an embedding store, save the new vectors (one segment per
+        checkpoint, see EmbeddingStore.save) and report the progress every `checkpoint_every` newly
+        embedded documents, so a killed run resumes from the last checkpoint: the documents already
+        stored are skipped. Checkpoints do not change the batches: in serial mode the chunks of all
+        the missing documents are batched together and the documents are saved as they complete.
+    on_checkpoint (callable, optional): Called without arguments after each checkpoint.
+    token_shards (TokenShardStore, optional): Pre-tokenized shards opened with open_token_shards; the
+        documents to embed are added to them first, then their chunks are read memory-mapped.
+
+    Returns:
+    numpy.ndarray: The document embeddings with shape documents x hidden size.
+    """
+    if not len(texts):
+        return np.zeros((0, load_finbert()[1].config.hidden_size), dtype=np.float32)
+
+    # Tokenize once in this process into the shards; the embedding workers only read them
+    if token_shards is not None and embedding_store is None:
+        build_token_shards(texts, token_shards)
+
+    if embedding_store is None:
+        chunk_embeddings = get_chunk_embeddings_sharded(texts, n_jobs, threads_per_job, chunk_size, batch_size, stride, max_tokens,
+                                                        token_shards)
+        return np.vstack([doc_chunk_embeddings.mean(axis=0) for doc_chunk_embeddings in chunk_embeddings])
+
+    expected_version = f"{get_preprocessing_version()}-chunk{chunk_size}-stride{stride}"
+    if embedding_store.preprocessing_version != expected_version:
+        raise ValueError(f"Embedding store holds {embedding_store.preprocessing_version!r} vectors, expected {expected_version!r}")
+
+    text_hashes = [content_hash(text) for text in texts]
+    missing = {text_hash: text for text_hash, text in zip(text_hashes, texts) if text_hash not in embedding_store}
+
+    if missing:
+        missing_hashes = list(missing)
+        if len(missing) < len(text_hashes):
+            print(f"Embedding store: {len(text_hashes) - len(missing)} documents already embedded, {len(missing)} to go")
+
+        if token_shards is not None:
+            build_token_shards(list(missing.values()), token_shards)
+
+        start_time = time.perf_counter()
+        if n_jobs <= 1:
+            # One batching plan over all the missing documents, whatever the checkpoint interval
+            completed = _iter_document_chunk_embeddings(list(missing.values()), chunk_size, batch_size, stride, max_tokens,
+                                                        token_shards)
+        else:
+            shards = _iter_chunk_embedding_shards(list(missing.values()), n_jobs, threads_per_job, chunk_size, batch_size,
+                                                  stride, max_tokens, token_shards)
+            completed = (doc_chunk_embeddings for _, shard_result in shards for doc_chunk_embeddings in shard_result)
+
+        for done, (text_hash, doc_chunk_embeddings) in enumerate(zip(missing_hashes, completed), 1):
+            embedding_store.add(text_hash, doc_chunk_embeddings)
+
+            if checkpoint_every and (done % checkpoint_every == 0 or done == len(missing)):
+                embedding_store.save()
+                _report_progress("Embedding", done, len(missing), start_time)
+                if on_checkpoint is not None:
+                    on_checkpoint()
+
+    return embedding_store.get_document_embeddings(text_hashes)
+
+# Function to get the (cached) embeddings of a list of anchor sentences
+def get_anchor_embeddings(sentences):
+    """
+    Returns the embeddings of the preprocessed anchor sentences, one row per sentence.
+
+    The anchors never change between documents, so they are embedded once per (model, sentence list)
+    and kept in memory and under ANCHOR_CACHE_DIR. The cache key hashes the model id, the preprocessing version
+    and the sentences, so editing HAWKISH_SENTENCES or DOVISH_SENTENCES invalidates it automatically.
+
+    Args:
+    sentences (list): The anchor sentences, e.g. HAWKISH_SENTENCES.
+
+    Returns:
+    numpy.ndarray: The anchor embeddings with shape sentences x hidden size.
+    """
+    cache_key = hashlib.sha256('\n'.join([get_model_id(), get_preprocessing_version()] + list(sentences)).encode('utf-8')).hexdigest()
+    if cache_key in _anchor_embeddings:
+        return _anchor_embeddings[cache_key]
+
+    cache_path = os.path.join(ANCHOR_CACHE_DIR, f"{cache_key}.npy")
+    embeddings = None
+    if os.path.exists(cache_path):
+        try:
+            embeddings = np.load(cache_path)
+        except (OSError, ValueError, EOFError):
+            # Unreadable cache entry (e.g. truncated): embed the anchors again and overwrite it
+            pass
+
+    if embeddings is None:
+        # Preprocess the anchor sentences before embedding, one forward pass each
+        embeddings = np.vstack([get_embedding(preprocess_text(sentence)) for sentence in sentences])
+        os.makedirs(ANCHOR_CACHE_DIR, exist_ok=True)
+
+        # Write next to the cache entry and swap it in, so a killed run never leaves a truncated .npy
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, 'wb') as file:
+            np.save(file, embeddings)
+        os.replace(tmp_path, cache_path)
+
+    _anchor_embeddings[cache_key] = embeddings
+    return embeddings
+
+# Function to compute the cosine similarity of every document to every anchor sentence
+def cosine_similarity_matrix(document_embeddings, anchor_embeddings):
+    """
+    Cosine similarity of every document embedding to every anchor embedding, as one matmul of the
+    L2-normalized rows (same values as sklearn's cosine_similarity, without its per-call overhead).
+
+    Args:
+    document_embeddings (numpy.ndarray): Document embeddings with shape documents x hidden size.
+    anchor_embeddings (numpy.ndarray): Anchor embeddings with shape anchors x hidden size.
+
+    Returns:
+    numpy.ndarray: The cosine similarities with shape documents x anchors.
+    """
+    def normalize(embeddings):
+        embeddings = np.atleast_2d(np.asarray(embeddings))
+        norms = np.sqrt(np.einsum('ij,ij->i', embeddings, embeddings))
+        norms[norms == 0] = 1  # Zero vectors stay zero instead of dividing by zero
+        return embeddings / norms[:, np.newaxis]
+
+    return normalize(document_embeddings) @ normalize(anchor_embeddings).T
+
+# Function to score many document embeddings against the hawkish and dovish anchors at once
+def score_document_embeddings(document_embeddings, hawkish_sentences=HAWKISH_SENTENCES, dovish_sentences=DOVISH_SENTENCES,
+                              per_anchor=False):
+    """
+    Hawkish/dovish factor scores of a matrix of document embeddings: the cosine similarity to each
+    anchor sentence (one docs x anchors matrix per side), averaged over the anchors.
+
+    Args:
+    document_embeddings (numpy.ndarray): Document embeddings with shape documents x hidden size,
+        e.g. from get_document_embeddings.
+    hawkish_sentences (list): The hawkish anchor sentences.
+    dovish_sentences (list): The dovish anchor sentences.
+    per_anchor (bool): Also return one column per anchor sentence (Hawkish_1..., Dovish_1...).
+
+    Returns:
+    pandas.DataFrame: One row per document with Hawkish_Score and Dovish_Score (and the per-anchor similarities).
+    """
+    hawkish_matrix = cosine_similarity_matrix(document_embeddings, get_anchor_embeddings(hawkish_sentences))
+    dovish_matrix = cosine_similarity_matrix(document_embeddings, get_anchor_embeddings(dovish_sentences))
+
+    scores_df = pd.DataFrame({
+        'Hawkish_Score': hawkish_matrix.mean(axis=1),
+        'Dovish_Score': dovish_matrix.mean(axis=1),
+    })
+    if per_anchor:
+        scores_df = pd.concat([
+            scores_df,
+            pd.DataFrame(hawkish_matrix, columns=[f'Hawkish_{i + 1}' for i in range(hawkish_matrix.shape[1])]),
+            pd.DataFrame(dovish_matrix, columns=[f'Dovish_{i + 1}' for i in range(dovish_matrix.shape[1])]),
+        ], axis=1)
+    return scores_df
 
 # Function to calculate similarity between text and hawkish/dovish sentences
-def calculate_similarity(text, hawkish_sentences, dovish_sentences):
-    # Get the embedding for the entire preprocessed document by chunking it
-    text_embedding = get_embedding_for_long_text(text)
+def calculate_similarity(text, hawkish_sentences, dovish_sentences, embedding_store=None):
+    # Get the embedding for the entire preprocessed document by chunking it (or from the embedding store)
+    text_embedding = get_document_embeddings([text], embedding_store)
+
+    # Compare against the cached embeddings of the hawkish and dovish sentences
+    scores = score_document_embeddings(text_embedding, hawkish_sentences, dovish_sentences)
+    return scores['Hawkish_Score'].iat[0], scores['Dovish_Score'].iat[0]
+
+# Function to build the passage retrieval index over the chunk embeddings of corpus stores
+def build_passage_index(store_paths, index_dir=None, embedding_store=None, chunk_size=512, stride=0, n_jobs=1,
+                        max_tokens=TOKEN_BUDGET, n_lists=None):
+    """
+    Builds a PassageIndex (see passage_index.py) over every chunk of every document of the given
+    corpus stores, so the passages behind a document's scores can be looked up instead of the
+    chunk embeddings being averaged away. Chunk embeddings come from the embedding store; the
+    documents missing from it are embedded first.
+
+    Args:
+    store_paths (list): Path prefixes of the corpus stores to index (minutes, statements, press conferences...).
+    index_dir (str, optional): Directory the index is saved to.
+    embedding_store (EmbeddingStore, optional): Store opened with open_embedding_store using the same chunking.
+    chunk_size (int): Maximum number of token ids per chunk, special tokens included.
+    stride (int): Number of tokens each chunk shares with the previous one (overlap).
+    n_jobs (int): Number of worker processes the missing documents are embedded with.
+    max_tokens (int, optional): Token budget per length-bucketed batch.
+    n_lists (int, optional): Number of IVF clusters of the approximate search mode.
+
+    Returns:
+    PassageIndex: The index.
+    """
+    from passage_index import PassageIndex, PASSAGE_COLUMNS
+
+    if embedding_store is None:
+        embedding_store = open_embedding_store(chunk_size=chunk_size, stride=stride)
+
+    documents = []
+    for store_path in store_paths:
+        with CorpusStore(store_path) as store:
+            for doc_type, (doc_id, date, text) in zip(store.index['Doc_Type'], store.iter_documents()):
+                documents.append((doc_id, date.strftime('%Y-%m-%d') if pd.notna(date) else '', doc_type, text))
+
+    get_document_embeddings([text for *_, text in documents], embedding_store, chunk_size, stride, n_jobs=n_jobs,
+                            max_tokens=max_tokens)
+    embedding_store.save()
+
+    embeddings, rows, texts = [], [], []
+    for doc_id, date, doc_type, text in documents:
+        chunk_embeddings = embedding_store.get_chunk_embeddings(content_hash(text))
+        passages = chunk_passages(text, chunk_size, stride)
+        if len(passages) != len(chunk_embeddings):
+            raise ValueError(f"{doc_id}: {len(passages)} passages for {len(chunk_embeddings)} stored chunk embeddings")
+        for chunk, (start, end, passage) in enumerate(passages):
+            rows.append((doc_id, date, doc_type, chunk, start, end))
+            texts.append(passage)
+        embeddings.append(chunk_embeddings)
+
+    index = PassageIndex(np.vstack(embeddings) if embeddings else np.zeros((0, load_finbert()[1].config.hidden_size)),
+                         pd.DataFrame(rows, columns=PASSAGE_COLUMNS), texts,
+                         {'model_id': get_model_id(), 'preprocessing_version': embedding_store.preprocessing_version})
+    if len(index):
+        index.build_ivf(n_lists)
+    if index_dir is not None:
+        index.save(index_dir)
+    return index
 
-    # Preprocess hawkish and dovish sentences before embedding
-    hawkish_scores = [cosine_similarity(text_embedding, get_embedding(preprocess_text(sentence))) for sentence in hawkish_sentences]
-    dovish_scores = [cosine_similarity(text_embedding, get_embedding(preprocess_text(sentence))) for sentence in dovish_sentences]
+# Function to find the passages nearest to a free-text query or a set of anchor sentences
+def search_passages(index, query, k=10, mode='exact', n_probe=8, doc_type=None):
+    """
+    Top-k passages of a PassageIndex for a query: a free-text string, or a list of anchor
+    sentences such as HAWKISH_SENTENCES, in which case a passage's score is its mean cosine
+    similarity to the anchors (the chunk-level counterpart of Hawkish_Score / Dovish_Score).
 
-    avg_hawkish = np.mean(hawkish_scores)
-    avg_dovish = np.mean(dovish_scores)
+    Args:
+    index (PassageIndex): Index built with build_passage_index under the current backend.
+    query (str or list): The query text, or the anchor sentences.
+    k (int): Number of passages to return.
+    mode (str): 'exact' or 'approximate' (see PassageIndex.search).
+    n_probe (int): Number of IVF clusters scanned in approximate mode.
+    doc_type (str, optional): Only return passages of this document type.
 
-    return avg_hawkish, avg_dovish
+    Returns:
+    pandas.DataFrame: Rank, Score, Doc_ID, Date, Doc_Type, Chunk, Start, End and Text of each passage, best first.
+    """
+    if index.meta.get('model_id') != get_model_id():
+        raise ValueError(f"Passage index holds {index.meta.get('model_id')!r} embeddings, current model is {get_model_id()!r}")
+
+    if isinstance(query, str):
+        query_embeddings = get_embedding(preprocess_text(query))
+    else:
+        query_embeddings = get_anchor_embeddings(list(query))
+
+    # Mean of the normalized queries: its dot product with a normalized passage is the mean cosine
+    query_embeddings = query_embeddings / np.linalg.norm(query_embeddings, axis=1, keepdims=True)
+    return index.search(query_embeddings.mean(axis=0), k, mode, n_probe, doc_type)
+
+# Function to checkpoint the scores of the documents embedded so far
+def _write_score_checkpoint(docs_df, text_hashes, embedding_store, checkpoint_file):
+    """
+    Scores the documents of `docs_df` whose embeddings are already in the embedding store and
+    writes them, atomically, to `checkpoint_file` (same layout as the final output).
+    """
+    done = np.array([text_hash in embedding_store for text_hash in text_hashes], dtype=bool)
+    if not done.any():
+        return
+    scores_df = score_document_embeddings(embedding_store.get_document_embeddings([h for h, d in zip(text_hashes, done) if d]))
+    checkpoint_df = docs_df[done].copy()
+    checkpoint_df['Hawkish_Score'] = scores_df['Hawkish_Score'].values
+    checkpoint_df['Dovish_Score'] = scores_df['Dovish_Score'].values
+    _write_csv_atomic(checkpoint_df, checkpoint_file)
+
+# Checkpoint file of an output CSV: the scores of the documents completed so far
+def _checkpoint_path(output_file):
+    return f"{os.path.splitext(output_file)[0]}.checkpoint.csv"
 
 # Main function to process CSVs and calculate factor similarity scores
-def process_fomc_documents():
+def process_fomc_documents(embedding_store=None, n_jobs=1, threads_per_job=None, max_tokens=TOKEN_BUDGET, checkpoint_every=25,
+                           token_shards=None):
+    # Embeddings of documents scored in earlier runs are reused from the on-disk store, so a
+    # killed run resumes from its last checkpoint
+    if embedding_store is None:
+        embedding_store = open_embedding_store()
+    # Documents are tokenized once per tokenizer version into the token shards
+    if token_shards is None:
+        token_shards = open_token_shards()
+
     # Load the cleaned data for Meeting Minutes and Statements
     minutes_df = pd.read_csv('data/processed/cleaned_meeting_minutes.csv')
     statements_df = pd.read_csv('data/processed/cleaned_statements.csv')
@@ -225,29 +1130,111 @@ def process_fomc_documents():
     statements_df['Hawkish_Score'] = 0.0
     statements_df['Dovish_Score'] = 0.0
 
-    # Calculate similarity scores for each row in the Meeting Minutes
-    print("Processing FOMC Meeting Minutes...")
-    for idx, row in minutes_df.iterrows():
-        hawkish, dovish = calculate_similarity(row['Federal_Reserve_Mins'], HAWKISH_SENTENCES, DOVISH_SENTENCES)
-        minutes_df.at[idx, 'Hawkish_Score'] = hawkish
-        minutes_df.at[idx, 'Dovish_Score'] = dovish
-        if idx % 10 == 0:  # Progress log
-            print(f"Processed {idx + 1} meeting minutes.")
-
-    # Calculate similarity scores for each row in the FOMC Statements
-    print("Processing FOMC Statements...")
-    for idx, row in statements_df.iterrows():
-        hawkish, dovish = calculate_similarity(row['FOMC_Statements'], HAWKISH_SENTENCES, DOVISH_SENTENCES)
-        statements_df.at[idx, 'Hawkish_Score'] = hawkish
-        statements_df.at[idx, 'Dovish_Score'] = dovish
-        if idx % 10 == 0:  # Progress log
-            print(f"Processed {idx + 1} statements.")
-
-    # Save the results back to CSV
-    minutes_df.to_csv('data/processed/cosine_sim_H-D-score_meeting_minutes.csv', index=False)
-    statements_df.to_csv('data/processed/cosine_sim_H-D-score_statements.csv', index=False)
+    outputs = [
+        (minutes_df, 'Federal_Reserve_Mins', 'data/processed/cosine_sim_H-D-score_meeting_minutes.csv'),
+        (statements_df, 'FOMC_Statements', 'data/processed/cosine_sim_H-D-score_statements.csv'),
+    ]
+    text_hashes = [[content_hash(text) for text in docs_df[text_column]] for docs_df, text_column, _ in outputs]
+
+    # Each checkpoint also writes the scores of the documents completed so far
+    def checkpoint_scores():
+        for (docs_df, _, output_file), doc_hashes in zip(outputs, text_hashes):
+            _write_score_checkpoint(docs_df, doc_hashes, embedding_store, _checkpoint_path(output_file))
+
+    # Embed all documents up front, so the chunks of short statements and long minutes are
+    # length-bucketed together (and sharded across worker processes if n_jobs > 1)
+    texts = minutes_df['Federal_Reserve_Mins'].tolist() + statements_df['FOMC_Statements'].tolist()
+    print(f"Embedding {len(texts)} documents with {n_jobs} worker process(es)...")
+    document_embeddings = get_document_embeddings(texts, embedding_store, n_jobs=n_jobs, threads_per_job=threads_per_job,
+                                                  max_tokens=max_tokens, checkpoint_every=checkpoint_every,
+                                                  on_checkpoint=checkpoint_scores, token_shards=token_shards)
+    embedding_store.save()
+
+    # Score all Meeting Minutes and FOMC Statements against the anchors in one docs x anchors matrix
+    print("Scoring FOMC Meeting Minutes and Statements...")
+    scores_df = score_document_embeddings(document_embeddings)
+    minutes_df['Hawkish_Score'] = scores_df['Hawkish_Score'].values[:len(minutes_df)]
+    minutes_df['Dovish_Score'] = scores_df['Dovish_Score'].values[:len(minutes_df)]
+    statements_df['Hawkish_Score'] = scores_df['Hawkish_Score'].values[len(minutes_df):]
+    statements_df['Dovish_Score'] = scores_df['Dovish_Score'].values[len(minutes_df):]
+
+    # Save the results back to CSV; the checkpoints are no longer needed
+    for docs_df, _, output_file in outputs:
+        _write_csv_atomic(docs_df, output_file)
+        if os.path.exists(_checkpoint_path(output_file)):
+            os.remove(_checkpoint_path(output_file))
 
     print("Factor similarity analysis complete. Results saved.")
 
+# Calculate factor similarity scores for a packed corpus store (see corpus_store.py)
+def process_corpus_store(store_path, output_file, start_year=2012, embedding_store=None, n_jobs=1, threads_per_job=None,
+                         max_tokens=TOKEN_BUDGET, checkpoint_every=25, token_shards=None):
+    """
+    Scores every document of a corpus store against the hawkish/dovish sentences, reading the
+    texts through the store's memory-mapped data file instead of one file per document.
+    The output has the Date, Text, Hawkish_Score, Dovish_Score layout of the press conference results.
+
+    Args:
+    store_path (str): Path prefix of the corpus store.
+    output_file (str): Path to save the scored CSV file.
+    start_year (int): Documents dated before this year are skipped.
+    embedding_store (EmbeddingStore, optional): Store of previously computed embeddings; opened with
+        open_embedding_store if omitted.
+    n_jobs (int): Number of worker processes the documents are embedded with (1 = serial).
+    threads_per_job (int, optional): Torch threads per worker process.
+    max_tokens (int, optional): Token budget per length-bucketed batch (None = fixed batches of 16 chunks).
+    checkpoint_every (int, optional): Save the embeddings and the scores completed so far (to
+        <output>.checkpoint.csv) every `checkpoint_every` documents; a rerun resumes from there.
+    token_shards (TokenShardStore, optional): Pre-tokenized input of the documents; opened with
+        open_token_shards if omitted.
+
+    Returns:
+    pandas.DataFrame: The scored documents.
+    """
+    if embedding_store is None:
+        embedding_store = open_embedding_store()
+    if token_shards is None:
+        token_shards = open_token_shards()
+
+    with CorpusStore(store_path) as store:
+        documents = [(date, text) for _, date, text in store.iter_documents() if not (pd.notna(date) and date.year < start_year)]
+    print(f"Processing {len(documents)} documents from {store_path}...")
+
+    scored_df = pd.DataFrame({'Date': [date for date, _ in documents], 'Text': [text for _, text in documents]})
+    text_hashes = [content_hash(text) for _, text in documents]
+    checkpoint_file = _checkpoint_path(output_file)
+
+    # Embed all documents up front (length-bucketed, sharded if n_jobs > 1), then score them in one matrix
+    document_embeddings = get_document_embeddings(
+        [text for _, text in documents], embedding_store, n_jobs=n_jobs, threads_per_job=threads_per_job,
+        max_tokens=max_tokens, checkpoint_every=checkpoint_every,
+        on_checkpoint=lambda: _write_score_checkpoint(scored_df, text_hashes, embedding_store, checkpoint_file),
+        token_shards=token_shards)
+    embedding_store.save()
+
+    scored_df = pd.concat([scored_df, score_document_embeddings(document_embeddings)], axis=1)
+    _write_csv_atomic(scored_df, output_file)
+    if os.path.exists(checkpoint_file):
+        os.remove(checkpoint_file)
+    print(f"Factor similarity scores saved to {output_file}")
+
+    return scored_df
+
 if __name__ == "__main__":
-    process_fomc_documents()
+    # Worker processes for the sharded embedding mode (1 = serial)
+    n_jobs = int(os.environ.get('FINBERT_N_JOBS', '1'))
+
+    process_fomc_documents(n_jobs=n_jobs)
+
+    # Press conference transcripts and speeches are scored from the corpus stores written by the scrapers
+    corpora = {
+        'press_conferences': ('data/raw/fomc_press_conf/texts', 'PressConferences'),
+        'speeches': ('data/raw/fed_speeches', 'Speeches'),
+    }
+    for corpus_name, (text_files_dir, doc_type) in corpora.items():
+        store_name = 'fed_speeches' if corpus_name == 'speeches' else corpus_name
+        store_path = f'data/processed/corpus_store/{store_name}'
+        if not store_exists(store_path) and os.path.isdir(text_files_dir):
+            pack_directory(text_files_dir, store_path, doc_type)
+        if store_exists(store_path):
+            process_corpus_store(store_path, f'data/processed/cosine_sim_H-D-score_{corpus_name}.csv', n_jobs=n_jobs)
@@ -4,6 +4,7 @@ from bs4 import BeautifulSoup
 import os
 import re
 from datetime import datetime
+from corpus_store import pack_directory
 
 def download_speeches(json_file_path, start_year=2012, end_year=2024):
     base_url = 'https://www.federalreserve.gov'
@@ -113,3 +114,6 @@ if __name__ == '__main__':
     # Update the path to your JSON file
     json_file_path = 'data/raw/fed_speeches.json'
     download_speeches(json_file_path)
+
+    # Pack the speeches into a single memory-mapped corpus store for the scoring stages
+    pack_directory('data/raw/fed_speeches', 'data/processed/corpus_store/fed_speeches', 'Speeches')
@@ -0,0 +1,205 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from dictionary_based_analysis import (load_dictionary, build_count_matrix, compute_idf,
+                                       compute_weighted_scores, _count_files)
+
+
+def _file_stats(text_files_dir, txt_files) -> np.ndarray:
+    # (size, mtime in ns) of each file: a changed pair means the document must be counted again
+    stats = [os.stat(os.path.join(text_files_dir, txt_file)) for txt_file in txt_files]
+    return np.array([(stat.st_size, stat.st_mtime_ns) for stat in stats], dtype=np.int64).reshape(-1, 2)
+
+
+class IncrementalDictionaryScorer:
+    """
+    Dictionary TF-IDF scorer that keeps its state between runs: the sparse dictionary word
+    counts and total word count of every scored document, plus the document frequency of
+    every word. New documents are tokenized on their own and folded into the document
+    frequencies, after which the IDF vector and all scores are re-weighted without reading
+    the rest of the corpus again. Scores are identical to a full `get_hawkish_dovish_score`.
+    """
+
+    def __init__(self, words_list, hawk_or_dove: str):
+        self.words_list = list(words_list)
+        self.hawk_or_dove = hawk_or_dove
+        self.doc_ids = []
+        self.count_matrix = sparse.csr_matrix((0, len(self.words_list)), dtype=np.int64)
+        self.total_word_count = np.zeros(0, dtype=np.int64)
+        self.doc_freq = np.zeros(len(self.words_list), dtype=np.int64)
+        # (size, mtime in ns) of each document's file when it was counted, to detect edits
+        self.file_stats = np.zeros((0, 2), dtype=np.int64)
+
+    @classmethod
+    def from_directory(cls, dictionary_path, text_files_dir, hawk_or_dove: str, cache=None, n_jobs=1):
+        """
+        Build the scorer state from every .txt file of a directory.
+
+        Args:
+        dictionary_path (str): Path to the dictionary file containing hawkish/dovish words.
+        text_files_dir (str): Directory containing text files to analyze.
+        hawk_or_dove (str): 'Hawk' or 'Dov', used in the score column name.
+        cache (TokenCountCache, optional): Token count cache to avoid re-reading unchanged files.
+        n_jobs (int): Number of worker processes used to read and tokenize the corpus.
+
+        Returns:
+        IncrementalDictionaryScorer: The scorer holding the whole directory.
+        """
+        scorer = cls(load_dictionary(dictionary_path), hawk_or_dove)
+        file_stats = _file_stats(text_files_dir, sorted(f for f in os.listdir(text_files_dir) if f.endswith('.txt')))
+        count_matrix, total_word_count, txt_files = build_count_matrix(scorer.words_list, text_files_dir, cache, n_jobs)
+        scorer._append(txt_files, count_matrix, total_word_count, file_stats)
+        return scorer
+
+    def _append(self, doc_ids, count_matrix, total_word_count, file_stats):
+        """
+        Append the rows of new documents and update the document frequencies online.
+        """
+        self.doc_ids.extend(doc_ids)
+        self.count_matrix = sparse.vstack([self.count_matrix, count_matrix], format='csr')
+        self.total_word_count = np.concatenate([self.total_word_count, total_word_count])
+        self.doc_freq += np.bincount(sparse.csr_matrix(count_matrix).indices, minlength=len(self.words_list))
+        self.file_stats = np.concatenate([self.file_stats, np.asarray(file_stats, dtype=np.int64).reshape(-1, 2)])
+
+    def remove_documents(self, doc_ids):
+        """
+        Remove documents from the scorer and take their words out of the document frequencies.
+
+        Args:
+        doc_ids (list): File names of the documents to remove.
+        """
+        removed = set(doc_ids)
+        keep = np.array([doc_id not in removed for doc_id in self.doc_ids], dtype=bool)
+        self.doc_freq -= np.bincount(self.count_matrix[~keep].indices, minlength=len(self.words_list))
+        self.doc_ids = [doc_id for doc_id in self.doc_ids if doc_id not in removed]
+        self.count_matrix = self.count_matrix[keep]
+        self.total_word_count = self.total_word_count[keep]
+        self.file_stats = self.file_stats[keep]
+
+    def add_files(self, text_files_dir, txt_files, cache=None):
+        """
+        Tokenize and add new documents of a directory to the scorer.
+
+        Args:
+        text_files_dir (str): Directory containing the new text files.
+        txt_files (list): File names of the new documents (used as document ids).
+        cache (TokenCountCache, optional): Token count cache to avoid re-reading unchanged files.
+        """
+        already_scored = set(self.doc_ids).intersection(txt_files)
+        if already_scored:
+            raise ValueError(f"Documents already scored: {sorted(already_scored)}")
+
+        lowered_words = [word.lower() for word in self.words_list]
+        file_stats = _file_stats(text_files_dir, txt_files)
+        indptr, cols, counts, total_word_count = _count_files(text_files_dir, txt_files, lowered_words, cache)
+        if cache is not None:
+            cache.save()
+
+        count_matrix = sparse.csr_matrix((counts, cols, indptr), shape=(len(txt_files), len(self.words_list)))
+        self._append(list(txt_files), count_matrix, total_word_count, file_stats)
+
+    def update_from_directory(self, text_files_dir, cache=None) -> list:
+        """
+        Bring the scorer in line with the .txt files of a directory: new files are added, files
+        whose size or modification time changed since they were counted are counted again, and
+        documents whose file is gone are removed. Unchanged files are not read.
+
+        Args:
+        text_files_dir (str): Directory containing text files to analyze.
+        cache (TokenCountCache, optional): Token count cache to avoid re-reading unchanged files.
+
+        Returns:
+        list: File names of the documents that were added or counted again.
+        """
+        txt_files = sorted(f for f in os.listdir(text_files_dir) if f.endswith('.txt'))
+        current_stats = dict(zip(txt_files, map(tuple, _file_stats(text_files_dir, txt_files))))
+        scored_stats = dict(zip(self.doc_ids, map(tuple, self.file_stats)))
+
+        deleted = [doc_id for doc_id in self.doc_ids if doc_id not in current_stats]
+        modified = [f for f in txt_files if f in scored_stats and scored_stats[f] != current_stats[f]]
+        new_files = [f for f in txt_files if f not in scored_stats]
+
+        if deleted or modified:
+            print(f"{text_files_dir}: {len(modified)} modified and {len(deleted)} deleted documents")
+            self.remove_documents(deleted + modified)
+
+        changed_files = sorted(modified + new_files)
+        if changed_files:
+            self.add_files(text_files_dir, changed_files, cache)
+        return changed_files
+
+    @property
+    def idf(self) -> np.ndarray:
+        return compute_idf(self.doc_freq, len(self.doc_ids))
+
+    def scores(self) -> pd.DataFrame:
+        """
+        Re-weight all documents with the current IDF vector.
+
+        Returns:
+        pd.DataFrame: DataFrame containing the weighted hawkish/dovish word score for each document,
+                      in the same layout and filename order as `get_hawkish_dovish_score`.
+        """
+        weighted_sum = compute_weighted_scores(self.count_matrix, self.total_word_count, idf=self.idf)
+        weighted_sum_df = pd.DataFrame({f'Weighted_{self.hawk_or_dove}ish_Sum': weighted_sum}, index=self.doc_ids)
+        return weighted_sum_df.sort_index()
+
+    def save(self, state_path):
+        """
+        Save the scorer state to a compressed .npz file.
+        """
+        state_dir = os.path.dirname(state_path)
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        np.savez_compressed(
+            state_path,
+            words_list=np.array(self.words_list, dtype=str),
+            hawk_or_dove=np.array(self.hawk_or_dove),
+            doc_ids=np.array(self.doc_ids, dtype=str),
+            indptr=self.count_matrix.indptr,
+            indices=self.count_matrix.indices,
+            data=self.count_matrix.data,
+            total_word_count=self.total_word_count,
+            doc_freq=self.doc_freq,
+            file_stats=self.file_stats,
+        )
+
+    @classmethod
+    def load(cls, state_path):
+        """
+        Load a scorer state saved with `save`.
+        """
+        with np.load(state_path) as state:
+            scorer = cls(state['words_list'].tolist(), str(state['hawk_or_dove']))
+            scorer.doc_ids = state['doc_ids'].tolist()
+            scorer.count_matrix = sparse.csr_matrix((state['data'], state['indices'], state['indptr']),
+                                                    shape=(len(scorer.doc_ids), len(scorer.words_list)))
+            scorer.total_word_count = state['total_word_count']
+            scorer.doc_freq = state['doc_freq']
+            scorer.file_stats = state['file_stats']
+        return scorer
+
+
+if __name__ == "__main__":
+    # Fold the documents added or edited since the last run into the saved state of each corpus
+    corpora = {
+        'Fed-chair-press-conf': 'data/raw/fomc_press_conf/texts',
+        'FOMC-meeting-minutes': 'data/raw/FOMC/meeting_minutes',
+        'FOMC-statements': 'data/raw/FOMC/statements',
+    }
+    dictionary_path = 'data/processed/hawkish_gpt_dict2.txt'
+
+    for corpus_name, text_files_dir in corpora.items():
+        state_path = f'data/cache/incremental/{corpus_name}_hdict2.npz'
+        if os.path.exists(state_path):
+            scorer = IncrementalDictionaryScorer.load(state_path)
+            new_files = scorer.update_from_directory(text_files_dir)
+        else:
+            scorer = IncrementalDictionaryScorer.from_directory(dictionary_path, text_files_dir, 'Hawk')
+            new_files = scorer.doc_ids
+        scorer.save(state_path)
+
+        print(f"{corpus_name}: added or updated {len(new_files)} documents")
+        print(scorer.scores().tail(10))
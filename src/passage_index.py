@@ -0,0 +1,219 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from corpus_store import CorpusStore, CorpusStoreWriter
+
+PASSAGE_COLUMNS = ['Doc_ID', 'Date', 'Doc_Type', 'Chunk', 'Start', 'End']
+SEARCH_MODES = ('exact', 'approximate')
+
+
+def _normalize_rows(embeddings) -> np.ndarray:
+    embeddings = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    norms = np.linalg.norm(embeddings, axis=1)
+    norms[norms == 0] = 1  # Zero vectors stay zero instead of dividing by zero
+    return embeddings / norms[:, np.newaxis]
+
+
+def _nearest_centroids(embeddings, centroids, block_size=65536) -> np.ndarray:
+    # Blocks bound the memory of the passages x centroids similarity matrix
+    return np.concatenate([np.argmax(np.asarray(embeddings[start:start + block_size]) @ centroids.T, axis=1)
+                           for start in range(0, len(embeddings), block_size)] + [np.zeros(0, dtype=np.int64)])
+
+
+def _write_atomic(path, write):
+    # Write next to the live file and swap it in, so a crash never leaves a torn file
+    root, extension = os.path.splitext(path)
+    tmp_path = f"{root}.tmp{extension}"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _write_json(path, data):
+    with open(path, 'w') as file:
+        json.dump(data, file)
+
+
+class PassageIndex:
+    """
+    Local vector index over chunk (passage) embeddings, for finding the passages nearest to an
+    anchor sentence, a set of anchors or a free-text query. No external vector database: the
+    embeddings are L2-normalized in one float32 matrix, so the cosine similarity to every passage
+    is a single matrix-vector product.
+
+    Two search modes:
+        exact        brute force over all passages
+        approximate  inverted file (IVF): the passages are clustered with spherical k-means and
+                     only the `n_probe` clusters whose centroids are nearest to the query are scanned
+
+    On disk, an index directory holds:
+        embeddings.npy   normalized passage embeddings (opened memory-mapped)
+        passages.csv     Doc_ID, Date, Doc_Type, Chunk, Start, End of each passage
+        texts.*          the passage texts, as a corpus store (see corpus_store.py)
+        centroids.npy / lists.npy   the IVF clustering, if built
+        meta.json        the model id, preprocessing version and chunking the embeddings come from
+    """
+
+    def __init__(self, embeddings, passages, texts, meta=None):
+        self.embeddings = _normalize_rows(embeddings) if not isinstance(embeddings, np.memmap) else embeddings
+        self.passages = passages.reset_index(drop=True)
+        self.texts = texts  # list of passage texts, or a CorpusStore keyed by passage position
+        self.meta = meta or {}
+
+        # IVF clustering: centroid of each list, and the passage positions of each list back to back
+        self._centroids = None
+        self._list_passages = None
+        self._list_bounds = None
+
+    def __len__(self):
+        return len(self.passages)
+
+    def get_text(self, position) -> str:
+        if isinstance(self.texts, CorpusStore):
+            return self.texts.get_text(str(position))
+        return self.texts[position]
+
+    def build_ivf(self, n_lists=None, n_iter=10, seed=0):
+        """
+        Cluster the passages for the approximate search mode (spherical k-means).
+
+        Args:
+        n_lists (int, optional): Number of clusters; defaults to the square root of the number of passages.
+        n_iter (int): Number of k-means iterations.
+        seed (int): Seed of the initial centroid draw.
+        """
+        n_lists = min(n_lists or max(1, int(np.sqrt(len(self)))), len(self))
+        rng = np.random.default_rng(seed)
+
+        # k-means runs on a sample of the passages (64 per cluster is plenty for the centroids)
+        sample = np.sort(rng.choice(len(self), min(len(self), 64 * n_lists), replace=False))
+        train = np.asarray(self.embeddings[sample])
+        centroids = train[rng.choice(len(train), n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignments = _nearest_centroids(train, centroids)
+            # Sum of the passages of each cluster, as a sparse clusters x passages product
+            membership = sparse.csr_matrix((np.ones(len(train), dtype=np.float32), (assignments, np.arange(len(train)))),
+                                           shape=(n_lists, len(train)))
+            sums = np.asarray(membership @ train)
+            # Empty clusters keep their previous centroid
+            filled = np.bincount(assignments, minlength=n_lists) > 0
+            centroids[filled] = _normalize_rows(sums[filled])
+
+        # Every passage goes to the list of its nearest centroid
+        assignments = _nearest_centroids(self.embeddings, centroids)
+        self._centroids = centroids
+        self._list_passages = np.argsort(assignments, kind='stable')
+        self._list_bounds = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=n_lists))])
+
+    def search(self, query_embedding, k=10, mode='exact', n_probe=8, doc_type=None) -> pd.DataFrame:
+        """
+        Top-k passages by cosine similarity to a query embedding.
+
+        Args:
+        query_embedding (np.ndarray): Query vector (hidden size). For a set of anchors, pass the mean
+            of their normalized embeddings: the score is then the passage's mean cosine to the anchors.
+        k (int): Number of passages to return.
+        mode (str): 'exact' (brute force) or 'approximate' (IVF, see build_ivf).
+        n_probe (int): Number of IVF clusters scanned in approximate mode.
+        doc_type (str, optional): Only return passages of this document type (e.g. "Minutes").
+
+        Returns:
+        pd.DataFrame: Rank, Score, the passage metadata and its Text, best first.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode {mode!r}, expected one of {SEARCH_MODES}")
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+
+        if mode == 'approximate':
+            if self._centroids is None:
+                self.build_ivf()
+            probed = np.argsort(-(self._centroids @ query), kind='stable')[:n_probe]
+            candidates = np.sort(np.concatenate([self._list_passages[self._list_bounds[c]:self._list_bounds[c + 1]] for c in probed]))
+        else:
+            candidates = np.arange(len(self))
+
+        if doc_type is not None:
+            candidates = candidates[self.passages['Doc_Type'].values[candidates] == doc_type]
+
+        scores = self.embeddings[candidates] @ query
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        results_df = self.passages.iloc[candidates[top]].copy()
+        results_df.insert(0, 'Score', scores[top])
+        results_df.insert(0, 'Rank', np.arange(1, len(top) + 1))
+        results_df['Text'] = [self.get_text(position) for position in candidates[top]]
+        return results_df.reset_index(drop=True)
+
+    def save(self, index_dir):
+        """
+        Write the index to a directory (see the class docstring for the layout).
+        """
+        os.makedirs(index_dir, exist_ok=True)
+
+        # Without meta.json the directory is not a loadable index, so a crash while the other
+        # files are swapped in never pairs new embeddings with old passages
+        meta_path = os.path.join(index_dir, 'meta.json')
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        _write_atomic(os.path.join(index_dir, 'embeddings.npy'), lambda path: np.save(path, np.asarray(self.embeddings)))
+        _write_atomic(os.path.join(index_dir, 'passages.csv'), lambda path: self.passages.to_csv(path, index=False))
+        if not isinstance(self.texts, CorpusStore) or self.texts.store_path != os.path.join(index_dir, 'texts'):
+            # The corpus store writer swaps its own files in on close
+            with CorpusStoreWriter(os.path.join(index_dir, 'texts')) as writer:
+                for position in range(len(self)):
+                    writer.add(str(position), self.passages['Date'].iat[position] or None,
+                               self.passages['Doc_Type'].iat[position], self.get_text(position))
+
+        for name in ('centroids.npy', 'lists.npy'):
+            if os.path.exists(os.path.join(index_dir, name)):
+                os.remove(os.path.join(index_dir, name))
+        if self._centroids is not None:
+            _write_atomic(os.path.join(index_dir, 'centroids.npy'), lambda path: np.save(path, self._centroids))
+            _write_atomic(os.path.join(index_dir, 'lists.npy'),
+                          lambda path: np.save(path, np.concatenate([self._list_bounds, self._list_passages])))
+
+        # meta.json goes last: it marks the directory as a complete index
+        _write_atomic(meta_path, lambda path: _write_json(path, self.meta))
+
+    @classmethod
+    def load(cls, index_dir):
+        """
+        Open an index written by `save`; the embeddings and passage texts are memory-mapped.
+        """
+        with open(os.path.join(index_dir, 'meta.json')) as file:
+            meta = json.load(file)
+        passages = pd.read_csv(os.path.join(index_dir, 'passages.csv'), dtype={'Doc_ID': str, 'Doc_Type': str},
+                               keep_default_na=False)
+        index = cls(np.load(os.path.join(index_dir, 'embeddings.npy'), mmap_mode='r'), passages,
+                    CorpusStore(os.path.join(index_dir, 'texts')), meta)
+
+        centroids_path = os.path.join(index_dir, 'centroids.npy')
+        if os.path.exists(centroids_path):
+            index._centroids = np.load(centroids_path)
+            lists = np.load(os.path.join(index_dir, 'lists.npy'))
+            index._list_bounds = lists[:len(index._centroids) + 1]
+            index._list_passages = lists[len(index._centroids) + 1:]
+        return index
+
+
+if __name__ == "__main__":
+    # Imported here so the index itself does not load FinBERT
+    import factor_similarity
+    from corpus_store import store_exists
+
+    # Index every packed corpus of the FinBERT pipeline
+    store_paths = [f'data/processed/corpus_store/{name}' for name in ('meeting_minutes', 'statements', 'press_conferences')]
+    store_paths = [store_path for store_path in store_paths if store_exists(store_path)]
+
+    index = factor_similarity.build_passage_index(store_paths, 'data/cache/passage_index')
+
+    for label, sentences in [('hawkish', factor_similarity.HAWKISH_SENTENCES), ('dovish', factor_similarity.DOVISH_SENTENCES)]:
+        print(f"\nMost {label} passages")
+        results_df = factor_similarity.search_passages(index, sentences, k=5, mode='approximate')
+        for _, row in results_df.iterrows():
+            print(f"{row['Rank']}. {row['Doc_ID']} ({row['Score']:.4f}): {row['Text'][:300]}...")
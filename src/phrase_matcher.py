@@ -0,0 +1,90 @@
+from collections import deque
+from text_normalization import normalize_words
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over words that counts every single- and multi-word phrase of a
+    dictionary in one linear pass over a document's normalized words.
+
+    Phrases are normalized like the documents, so "ACUTELY AWARE" and "Data-dependent approach"
+    match regardless of case and surrounding punctuation. Overlapping matches are all counted.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = list(phrases)
+
+        # Trie over words: goto transitions, failure links, and the phrases ending at each state
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for phrase_index, phrase in enumerate(self.phrases):
+            words = normalize_words(phrase)
+            if not words:
+                continue
+            state = 0
+            for word in words:
+                next_state = self._goto[state].get(word)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][word] = next_state
+                state = next_state
+            self._out[state].append(phrase_index)
+
+        # Breadth-first construction of the failure links; each state also inherits the
+        # outputs of its failure state (the phrases that are suffixes of its path)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail_state = self._fail[state]
+                while fail_state and word not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                self._fail[next_state] = self._goto[fail_state].get(word, 0) if state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def count_words(self, words) -> list:
+        """
+        Count the occurrences of every phrase in a sequence of normalized words.
+
+        Args:
+        words (list): Normalized words of a document (see text_normalization.normalize_words).
+
+        Returns:
+        list: Occurrence count of each phrase, in dictionary order.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        root = goto[0]
+        counts = [0] * len(self.phrases)
+        state = 0
+
+        for word in words:
+            # Fast path: most words neither continue a match nor start one
+            if state == 0:
+                state = root.get(word, 0)
+            else:
+                while state and word not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(word, 0)
+            for phrase_index in out[state]:
+                counts[phrase_index] += 1
+
+        return counts
+
+    def count_text(self, text):
+        """
+        Normalize a document and count the occurrences of every phrase.
+
+        Args:
+        text (str): Raw document text.
+
+        Returns:
+        tuple: (occurrence count of each phrase, total number of normalized words)
+        """
+        words = normalize_words(text)
+        return self.count_words(words), len(words)
@@ -1,6 +1,7 @@
 import requests
 import os
 from PyPDF2 import PdfReader
+from corpus_store import pack_directory
 
 def download_and_extract_fomc_press_conferences(dates, output_dir='data/raw/fomc_press_conf'):
     base_url = 'https://www.federalreserve.gov/mediacenter/files/FOMCpresconf{}.pdf'
@@ -75,3 +76,6 @@ if __name__ == '__main__':
 
     
     download_and_extract_fomc_press_conferences(dates)
+
+    # Pack the transcripts into a single memory-mapped corpus store for the scoring stages
+    pack_directory('data/raw/fomc_press_conf/texts', 'data/processed/corpus_store/press_conferences', 'PressConferences')
@@ -107,6 +107,51 @@ import statsmodels.api as sm
 import matplotlib.pyplot as plt
 import os
 
+def forward_cumulative_change(event_dates, dates, values, window=5) -> np.ndarray:
+    """
+    Sum of a market variable over the first `window` available market days on or after each event date.
+
+    The non-null observations are sorted by date once and each event date is located with a binary
+    search, so finding the windows costs O(n log n) in the length of the market history instead of
+    a scan of the history per event. The windows are then summed in one vectorized gather; the
+    values of each window are added in the same order as a pandas sum over them, so the results
+    are bit-identical to summing each window with pandas.
+
+    Parameters:
+    -----------
+    event_dates: array-like
+        Dates to compute the forward cumulative change for.
+    dates: array-like
+        Date of each market observation.
+    values: array-like
+        Value of the market variable on each date (NaN when not available).
+    window: int, optional (default=5)
+        The number of available market days to sum.
+
+    Returns:
+    --------
+    np.ndarray
+        The cumulative change for each event date, NaN when fewer than `window` market days remain.
+    """
+    dates = pd.to_datetime(pd.Series(dates), errors='coerce').values
+    values = np.asarray(values, dtype=np.float64)
+
+    # Only dated, non-null observations count as available market days
+    available = ~pd.isna(dates) & ~np.isnan(values)
+    order = np.argsort(dates[available], kind='stable')
+    dates = dates[available][order]
+    values = values[available][order]
+
+    # Position of the first market day on or after each event date
+    event_dates = pd.to_datetime(pd.Series(event_dates), errors='coerce').values
+    starts = np.searchsorted(dates, event_dates, side='left')
+    has_window = ~pd.isna(event_dates) & (starts + window <= len(dates))
+
+    cumulative_change = np.full(len(event_dates), np.nan)
+    window_positions = starts[has_window, None] + np.arange(window)
+    cumulative_change[has_window] = values[window_positions].sum(axis=1)
+    return cumulative_change
+
 def run_regression_compute_stats(hawkish_df, market_df, market_var, hawkish_change_col, predictor_var, fed_doc, window=5):
     """
     Perform regression analysis and compute statistical metrics for the given market variable and hawkish score changes.
@@ -139,29 +184,10 @@ def run_regression_compute_stats(hawkish_df, market_df, market_var, hawkish_chan
     # Sort by Date to ensure proper sequential handling
     merged_df = merged_df.sort_values('Date')
 
-    # Initialize a list to store cumulative changes
-    cumulative_changes = []
-
-    # Loop through the dataframe to calculate cumulative change in the market variable over the next 'window' available market days
-    for i in range(len(merged_df)):
-        if pd.notna(merged_df.iloc[i][hawkish_change_col]):  # Check if this row contains a hawkish score change
-            current_date = merged_df.iloc[i]['Date']
-
-            # Get the next 'window' available market days including the current date
-            future_market_data = merged_df[(merged_df['Date'] >= current_date) & (pd.notna(merged_df[market_var]))]
-
-            if len(future_market_data) >= window:
-                # Sum the market variable for the next 'window' available market days
-                cumulative_change = future_market_data[market_var].iloc[:window].sum()
-            else:
-                cumulative_change = None  # If not enough data points available for the window
-
-            cumulative_changes.append(cumulative_change)
-        else:
-            cumulative_changes.append(None)  # No hawkish score change on this row
-
-    # Add the cumulative changes as a new column
-    merged_df['cumulative_change'] = cumulative_changes
+    # Cumulative change in the market variable over the next 'window' available market days
+    # (including the current date), on the rows that contain a hawkish score change
+    cumulative_changes = forward_cumulative_change(merged_df['Date'], merged_df['Date'], merged_df[market_var], window)
+    merged_df['cumulative_change'] = np.where(merged_df[hawkish_change_col].notna(), cumulative_changes, np.nan)
 
     # Convert hawkish_change_col to numeric to avoid any issues with mixed types
     merged_df[hawkish_change_col] = pd.to_numeric(merged_df[hawkish_change_col], errors='coerce')
@@ -101,6 +101,8 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from regression_analysis import forward_cumulative_change
+
 def run_regression_and_plot_quintiles(hawkish_df, market_df, market_var, hawkish_change_col, predictor_var:str, fed_doc:str, window=5, num_quintiles=5):
     """
     Perform regression analysis and plot quintile-based results for median 5-day cumulative market changes.
@@ -134,29 +136,10 @@ def run_regression_and_plot_quintiles(hawkish_df, market_df, market_var, hawkish
     # Sort by Date to ensure proper sequential handling
     merged_df = merged_df.sort_values('Date')
 
-    # Initialize a list to store cumulative changes
-    cumulative_changes = []
-
-    # Loop through the dataframe to calculate cumulative change in the market variable over the next 'window' available market days
-    for i in range(len(merged_df)):
-        if pd.notna(merged_df.iloc[i][hawkish_change_col]):  # Check if this row contains a hawkish score change
-            current_date = merged_df.iloc[i]['Date']
-
-            # Get the next 'window' available market days including the current date
-            future_market_data = merged_df[(merged_df['Date'] >= current_date) & (pd.notna(merged_df[market_var]))]
-
-            if len(future_market_data) >= window:
-                # Sum the market variable for the next 'window' available market days
-                cumulative_change = future_market_data[market_var].iloc[:window].sum()
-            else:
-                cumulative_change = None  # If not enough data points available for the window
-
-            cumulative_changes.append(cumulative_change)
-        else:
-            cumulative_changes.append(None)  # No hawkish score change on this row
-
-    # Add the cumulative changes as a new column
-    merged_df['cumulative_change'] = cumulative_changes
+    # Cumulative change in the market variable over the next 'window' available market days
+    # (including the current date), on the rows that contain a hawkish score change
+    cumulative_changes = forward_cumulative_change(merged_df['Date'], merged_df['Date'], merged_df[market_var], window)
+    merged_df['cumulative_change'] = np.where(merged_df[hawkish_change_col].notna(), cumulative_changes, np.nan)
 
     # Drop rows where cumulative changes or hawkish_change_col are missing
     merged_df = merged_df.dropna(subset=['cumulative_change', hawkish_change_col])
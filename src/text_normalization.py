@@ -0,0 +1,124 @@
+import re
+
+# Bump whenever TextNormalizer, the word patterns or the stop word list change, so stored
+# embeddings of normalized text are not reused
+NORMALIZER_VERSION = 'fast-lower-nopunct-nostopwords-v1'
+
+# NLTK's English stop word list (nltk.corpus.stopwords.words('english')), frozen here so the
+# normalizer needs neither NLTK nor a corpus download
+ENGLISH_STOP_WORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours yourself yourselves
+he him his himself she she's her hers herself it it's its itself they them their theirs themselves
+what which who whom this that that'll these those am is are was were be been being have has had
+having do does did doing a an the and but if or because as until while of at by for with about
+against between into through during before after above below to from up down in out on off over
+under again further then once here there when where why how all any both each few more most other
+some such no nor not only own same so than too very s t can will just don don't should should've
+now d ll m o re ve y ain aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn
+hasn't haven haven't isn isn't ma mightn mightn't mustn mustn't needn needn't shan shan't shouldn
+shouldn't wasn wasn't weren weren't won won't wouldn wouldn't
+""".split())
+
+# Words are runs of letters/digits, optionally joined by intra-word hyphens or apostrophes
+# ("above-trend", "committee's"); any other punctuation separates words.
+ASCII_WORD_PATTERN = r"[a-z0-9]+(?:['\-][a-z0-9]+)*"
+
+# Same, for any Unicode letter or digit, with decimal points kept inside numbers ("2.5", "4½")
+WORD_PATTERN = r"[^\W_]+(?:(?:['’\-]|(?<=\d)\.(?=\d))[^\W_]+)*"
+
+# Whitespace-separated tokens with their punctuation attached, exactly the tokens of str.split()
+WHITESPACE_PATTERN = r"\S+"
+
+
+class TextNormalizer:
+    """
+    Lower-casing, punctuation stripping, stop word removal and tokenization in a single regex
+    pass, with the pattern and the stop word set compiled once.
+
+    The word lists it returns are the pre-tokenized input Hugging Face fast tokenizers accept
+    with `is_split_into_words=True`, and `pre_tokenize_str` returns words with character
+    offsets in the format of `tokenizers` pre-tokenizers.
+    """
+
+    def __init__(self, stop_words=ENGLISH_STOP_WORDS, word_pattern=WORD_PATTERN):
+        self.stop_words = frozenset(stop_words or ())
+        # str.split() gives the same tokens as the whitespace pattern, several times faster
+        self._split = word_pattern == WHITESPACE_PATTERN
+        self._findall = re.compile(word_pattern).findall
+        self._finditer = re.compile(word_pattern).finditer
+        # Fallback for the rare texts whose length lower() changes ("İ"): match the original text
+        self._finditer_original = re.compile(word_pattern, re.IGNORECASE).finditer
+
+    def tokens(self, text) -> list:
+        """
+        Normalized words of a text, in order.
+        """
+        words = text.lower().split() if self._split else self._findall(text.lower())
+        if not self.stop_words:
+            return words
+        stop_words = self.stop_words
+        return [word for word in words if word not in stop_words]
+
+    def normalize(self, text) -> str:
+        """
+        Normalized words of a text joined by single spaces.
+        """
+        return ' '.join(self.tokens(text))
+
+    def tokens_batch(self, texts) -> list:
+        """
+        Normalized words of several texts, one list per text (the `is_split_into_words=True` input of a fast tokenizer).
+        """
+        return [self.tokens(text) for text in texts]
+
+    def normalize_batch(self, texts) -> list:
+        """
+        Normalized strings of several texts.
+        """
+        return [self.normalize(text) for text in texts]
+
+    def pre_tokenize_str(self, text) -> list:
+        """
+        Normalized words of a text with their (start, end) character offsets in the original text,
+        like `tokenizers.pre_tokenizers.PreTokenizer.pre_tokenize_str`.
+        """
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            # Same words as `tokens`, with offsets that are valid in the original text
+            words = ((match.group(), match.span()) for match in self._finditer(lowered))
+        else:
+            words = ((match.group().lower(), match.span()) for match in self._finditer_original(text))
+        return [(word, span) for word, span in words if word not in self.stop_words]
+
+
+# Tokens of the 'split' dictionary engine (token_cache.count_tokens): punctuation and stop
+# words kept
+_whitespace_normalizer = TextNormalizer(stop_words=None, word_pattern=WHITESPACE_PATTERN)
+
+# Words of the 'phrase' dictionary engine: punctuation stripped, stop words kept since the
+# document length counts every word
+_dictionary_normalizer = TextNormalizer(stop_words=None, word_pattern=ASCII_WORD_PATTERN)
+
+# Input of FinBERT (factor_similarity.preprocess_text)
+finbert_normalizer = TextNormalizer()
+
+
+def whitespace_tokens(text) -> list:
+    """
+    Lower-case a text and split it on whitespace, keeping the punctuation attached to words.
+    """
+    return _whitespace_normalizer.tokens(text)
+
+
+def normalize_words(text) -> list:
+    """
+    Lower-case a text and split it into words, dropping the punctuation attached to them
+    (so "inflation," and "(inflation)" both become "inflation").
+
+    Args:
+    text (str): Raw text.
+
+    Returns:
+    list: The normalized words, in order.
+    """
+    return _dictionary_normalizer.tokens(text)
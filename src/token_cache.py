@@ -0,0 +1,154 @@
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+from collections import Counter
+from text_normalization import whitespace_tokens
+
+# Bump whenever count_tokens changes so that stale cached counts are discarded
+TOKENIZER_VERSION = 'lower-whitespace-split-v1'
+
+
+def count_tokens(text):
+    """
+    Tokenize a document the way the dictionary scorer does: lower-case and split on whitespace.
+
+    Args:
+    text (str): Raw document text.
+
+    Returns:
+    tuple: (Counter of token counts, total number of tokens)
+    """
+    tokens = whitespace_tokens(text)
+    return Counter(tokens), len(tokens)
+
+
+class TokenCountCache:
+    """
+    On-disk cache of per-document token counts, keyed by the SHA-256 of the file content.
+
+    A (path, size, mtime) index sits in front of the content hashes, so unchanged files are
+    served from the cache after a single os.stat without reading the raw text. A changed
+    file gets re-hashed and re-tokenized automatically. Entries are evicted least recently
+    used first once the cache holds more than `max_documents` documents.
+    """
+
+    def __init__(self, cache_path='data/cache/token_counts.sqlite', max_documents=10000):
+        self.cache_path = cache_path
+        self.max_documents = max_documents
+
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(cache_path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS documents (
+                content_hash TEXT PRIMARY KEY,
+                total_words INTEGER NOT NULL,
+                token_counts BLOB NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                content_hash TEXT NOT NULL
+            );
+        """)
+
+        # Drop everything cached by a different tokenizer
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'tokenizer_version'").fetchone()
+        if row is None or row[0] != TOKENIZER_VERSION:
+            self.clear()
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('tokenizer_version', ?)", (TOKENIZER_VERSION,))
+            self._conn.commit()
+
+        # Content hashes looked up since the last save, to refresh their LRU timestamp
+        self._used_hashes = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get_token_counts(self, file_path):
+        """
+        Return the token counts of a text file, reading it only if it is not cached or has changed.
+
+        Args:
+        file_path (str): Path to the .txt document.
+
+        Returns:
+        tuple: (Counter of token counts, total number of tokens)
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+
+        # Fast path: the file is unchanged since it was last hashed
+        row = self._conn.execute(
+            "SELECT d.content_hash, d.total_words, d.token_counts FROM files f "
+            "JOIN documents d ON d.content_hash = f.content_hash "
+            "WHERE f.path = ? AND f.size = ? AND f.mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        if row is not None:
+            self.hits += 1
+            self._used_hashes.add(row[0])
+            return pickle.loads(row[2]), row[1]
+
+        # Slow path: hash the content, which may still be cached under another path or mtime
+        with open(path, 'rb') as file:
+            raw = file.read()
+        content_hash = hashlib.sha256(raw).hexdigest()
+        self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                           (path, stat.st_size, stat.st_mtime_ns, content_hash))
+
+        row = self._conn.execute("SELECT total_words, token_counts FROM documents WHERE content_hash = ?",
+                                 (content_hash,)).fetchone()
+        if row is not None:
+            self.hits += 1
+            self._used_hashes.add(content_hash)
+            return pickle.loads(row[1]), row[0]
+
+        self.misses += 1
+        word_counter, total_words = count_tokens(raw.decode('utf-8'))
+        self._conn.execute("INSERT INTO documents VALUES (?, ?, ?, ?)",
+                           (content_hash, total_words, pickle.dumps(dict(word_counter), protocol=pickle.HIGHEST_PROTOCOL), time.time()))
+        self._used_hashes.add(content_hash)
+        return word_counter, total_words
+
+    def evict(self):
+        """
+        Remove documents no file points to anymore, then the least recently used documents
+        beyond `max_documents`.
+        """
+        self._conn.execute("DELETE FROM documents WHERE content_hash NOT IN (SELECT content_hash FROM files)")
+        self._conn.execute(
+            "DELETE FROM documents WHERE content_hash IN ("
+            "SELECT content_hash FROM documents ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_documents,),
+        )
+        self._conn.execute("DELETE FROM files WHERE content_hash NOT IN (SELECT content_hash FROM documents)")
+
+    def save(self):
+        """
+        Refresh the LRU timestamps of the documents used since the last save, evict and commit.
+        """
+        now = time.time()
+        self._conn.executemany("UPDATE documents SET last_used = ? WHERE content_hash = ?",
+                               [(now, content_hash) for content_hash in self._used_hashes])
+        self._used_hashes.clear()
+        self.evict()
+        self._conn.commit()
+
+    def clear(self):
+        """
+        Remove every cached document and file entry.
+        """
+        self._conn.execute("DELETE FROM documents")
+        self._conn.execute("DELETE FROM files")
+        self._conn.commit()
+
+    def close(self):
+        self.save()
+        self._conn.close()
@@ -0,0 +1,148 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+
+INDEX_COLUMNS = ['Content_Hash', 'Shard', 'Token_Start', 'Token_Count', 'Chunk_Start', 'Chunk_Count']
+
+
+class TokenShardStore:
+    """
+    Pre-tokenized FinBERT input: the token ids of every document and the offsets of its chunks,
+    written once per tokenizer version into compact NumPy shards, so embedding runs read them
+    memory-mapped instead of preprocessing and tokenizing the text again.
+
+    Each (tokenizer version, chunking) pair gets its own directory, holding:
+        shard-NNNNN.tokens.npy  int32 token ids of the shard's documents, back to back (no [CLS]/[SEP])
+        shard-NNNNN.chunks.npy  (start, length) of every chunk within the shard's token ids
+        index.csv               Content_Hash, Shard, Token_Start, Token_Count, Chunk_Start, Chunk_Count
+    Adding documents writes a new shard; existing shards are never rewritten.
+    """
+
+    def __init__(self, shard_dir='data/cache/token_shards', tokenizer_version='v1', chunk_size=512, stride=0):
+        self.tokenizer_version = tokenizer_version
+        self.chunk_size = chunk_size
+        self.stride = stride
+
+        key = hashlib.sha256(f"{tokenizer_version}\nchunk{chunk_size}-stride{stride}".encode('utf-8')).hexdigest()[:16]
+        self.path = os.path.join(shard_dir, key)
+        os.makedirs(self.path, exist_ok=True)
+
+        meta_path = os.path.join(self.path, 'meta.json')
+        if not os.path.exists(meta_path):
+            with open(meta_path, 'w') as file:
+                json.dump({'tokenizer_version': tokenizer_version, 'chunk_size': chunk_size, 'stride': stride}, file)
+
+        self._load()
+
+    # Memory-mapped shards are not pickled: worker processes re-open the store from its directory
+    def __getstate__(self):
+        return {'path': self.path, 'tokenizer_version': self.tokenizer_version, 'chunk_size': self.chunk_size, 'stride': self.stride}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._load()
+
+    def _shard_path(self, shard, kind):
+        return os.path.join(self.path, f"shard-{shard:05d}.{kind}.npy")
+
+    def _load(self):
+        index_path = os.path.join(self.path, 'index.csv')
+        index = pd.read_csv(index_path) if os.path.exists(index_path) else pd.DataFrame(columns=INDEX_COLUMNS)
+
+        # Content hash -> (shard, token start, token count, chunk start, chunk count)
+        self._index = {row[0]: tuple(int(value) for value in row[1:]) for row in index[INDEX_COLUMNS].itertuples(index=False)}
+        self._n_shards = int(index['Shard'].max()) + 1 if len(index) else 0
+        self._tokens = {}
+        self._chunks = {}
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, text_hash):
+        return text_hash in self._index
+
+    def _shard(self, shard):
+        if shard not in self._tokens:
+            self._tokens[shard] = np.load(self._shard_path(shard, 'tokens'), mmap_mode='r')
+            self._chunks[shard] = np.load(self._shard_path(shard, 'chunks'), mmap_mode='r')
+        return self._tokens[shard], self._chunks[shard]
+
+    def get_token_ids(self, text_hash) -> np.ndarray:
+        """
+        Token ids of a stored document (without [CLS]/[SEP]), as a read-only memory-mapped view.
+        """
+        shard, token_start, token_count, _, _ = self._index[text_hash]
+        return self._shard(shard)[0][token_start:token_start + token_count]
+
+    def get_chunks(self, text_hash, cls_token_id, sep_token_id) -> list:
+        """
+        Chunks of a stored document as lists of token ids framed by [CLS]/[SEP], the same chunks
+        factor_similarity.split_into_token_chunks returns for the document's text.
+        """
+        shard, token_start, _, chunk_start, chunk_count = self._index[text_hash]
+        tokens, chunks = self._shard(shard)
+        return [[cls_token_id] + tokens[token_start + start:token_start + start + length].tolist() + [sep_token_id]
+                for start, length in chunks[chunk_start:chunk_start + chunk_count]]
+
+    def add_documents(self, text_hashes, token_ids, chunk_offsets):
+        """
+        Write a new shard with the given documents (documents already stored are skipped).
+
+        Args:
+        text_hashes (list): Content hash of each document (see embedding_store.content_hash).
+        token_ids (list): Token ids of each document, without [CLS]/[SEP].
+        chunk_offsets (list): (start, length) of each chunk of each document within its token ids.
+
+        Returns:
+        int: Number of documents added.
+        """
+        seen = set(self._index)
+        new = []
+        for i, text_hash in enumerate(text_hashes):
+            if text_hash not in seen:
+                seen.add(text_hash)
+                new.append(i)
+        if not new:
+            return 0
+
+        shard = self._n_shards
+        rows, token_start, chunk_start = [], 0, 0
+        for i in new:
+            rows.append((text_hashes[i], shard, token_start, len(token_ids[i]), chunk_start, len(chunk_offsets[i])))
+            token_start += len(token_ids[i])
+            chunk_start += len(chunk_offsets[i])
+
+        tokens = np.concatenate([np.asarray(token_ids[i], dtype=np.int32) for i in new] + [np.zeros(0, dtype=np.int32)])
+        chunks = np.concatenate([np.asarray(chunk_offsets[i], dtype=np.int32).reshape(-1, 2) for i in new])
+
+        # Write the shard files next to their final names and swap them in, then the index
+        for kind, array in [('tokens', tokens), ('chunks', chunks)]:
+            tmp_path = self._shard_path(shard, f'{kind}.tmp')
+            np.save(tmp_path, array)
+            os.replace(tmp_path, self._shard_path(shard, kind))
+
+        index = pd.DataFrame([(h,) + values for h, values in self._index.items()] + rows, columns=INDEX_COLUMNS)
+        tmp_path = os.path.join(self.path, 'index.tmp.csv')
+        index.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(self.path, 'index.csv'))
+
+        self._load()
+        return len(new)
+
+
+if __name__ == "__main__":
+    # Imported here so the shard store itself does not load FinBERT
+    import factor_similarity
+    from corpus_store import CorpusStore, store_exists
+
+    # Pre-tokenize every packed corpus of the FinBERT pipeline
+    token_shards = factor_similarity.open_token_shards()
+    for name in ('meeting_minutes', 'statements', 'press_conferences', 'fed_speeches'):
+        store_path = f'data/processed/corpus_store/{name}'
+        if store_exists(store_path):
+            with CorpusStore(store_path) as store:
+                texts = [text for _, _, text in store.iter_documents()]
+            n_added = factor_similarity.build_token_shards(texts, token_shards)
+            print(f"{name}: {n_added} documents tokenized, {len(texts) - n_added} already in the shards")
@@ -0,0 +1,189 @@
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+
+import factor_similarity
+from dictionary_based_analysis import load_dictionary
+from phrase_matcher import PhraseMatcher
+from corpus_store import iter_text_files
+
+# Dictionaries whose terms mark a paragraph as a candidate for FinBERT (the composite score's pair)
+PREFILTER_DICTIONARIES = ('data/processed/hawkish_gpt_dict2.txt', 'data/processed/dovish_gpt_dict.txt')
+
+# Blank lines separate the sections of the minutes; sentences end with ., ! or ? followed by a capital
+_BLOCK_PATTERN = re.compile(r'\n\s*\n')
+_SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+(?=["“(]?[A-Z])')
+
+
+def split_paragraphs(text, max_words=150) -> list:
+    """
+    Split a document into paragraphs: the blocks between blank lines, with blocks longer than
+    `max_words` cut at sentence boundaries into pieces of about `max_words` words (the raw minutes
+    and transcripts are line-wrapped, so their blocks can span whole sections).
+
+    Args:
+    text (str): Raw document text.
+    max_words (int): Target maximum number of words per paragraph.
+
+    Returns:
+    list: The paragraphs, in document order (whitespace-only ones dropped).
+    """
+    paragraphs = []
+    for block in _BLOCK_PATTERN.split(text):
+        if not block.strip():
+            continue
+        if len(block.split()) <= max_words:
+            paragraphs.append(block.strip())
+            continue
+
+        # Greedily group consecutive sentences up to max_words
+        current, current_words = [], 0
+        for sentence in _SENTENCE_PATTERN.split(block):
+            sentence_words = len(sentence.split())
+            if current and current_words + sentence_words > max_words:
+                paragraphs.append(' '.join(current))
+                current, current_words = [], 0
+            current.append(sentence.strip())
+            current_words += sentence_words
+        if current:
+            paragraphs.append(' '.join(current))
+    return paragraphs
+
+
+def select_candidate_paragraphs(paragraphs, matcher, recall=0.9) -> list:
+    """
+    Pick the paragraphs that carry the hawkish/dovish language of a document: paragraphs are ranked
+    by their number of dictionary hits and the fewest needed to cover `recall` of the document's
+    hits are kept.
+
+    Args:
+    paragraphs (list): The paragraphs of a document (see split_paragraphs).
+    matcher (PhraseMatcher): Compiled matcher over the hawkish and dovish dictionary terms.
+    recall (float): Share of the document's dictionary hits the selected paragraphs must contain
+        (1.0 keeps every paragraph with at least one hit).
+
+    Returns:
+    list: Positions of the selected paragraphs, in document order (empty if the document has no hits).
+    """
+    hits = np.array([sum(matcher.count_text(paragraph)[0]) for paragraph in paragraphs], dtype=np.int64)
+    if not hits.sum():
+        return []
+
+    # Most hits first, earlier paragraphs first among ties
+    order = np.argsort(-hits, kind='stable')
+    n_selected = int(np.searchsorted(np.cumsum(hits[order]), recall * hits.sum() - 1e-9)) + 1
+    return sorted(order[:n_selected].tolist())
+
+
+def prefilter_documents(texts, recall=0.9, dictionary_paths=PREFILTER_DICTIONARIES, max_words=150) -> pd.DataFrame:
+    """
+    First stage: reduce each document to its candidate paragraphs. Documents without any
+    dictionary hit are kept whole, so every document still gets a FinBERT score.
+
+    Returns:
+    pd.DataFrame: One row per document with the filtered Text, the number of Paragraphs and
+                  Selected_Paragraphs, the Text_Share kept (characters) and whether it Fell_Back
+                  to the whole document.
+    """
+    matcher = PhraseMatcher([word for path in dictionary_paths for word in load_dictionary(path)])
+
+    rows = []
+    for text in texts:
+        paragraphs = split_paragraphs(text, max_words)
+        selected = select_candidate_paragraphs(paragraphs, matcher, recall)
+        filtered = '\n\n'.join(paragraphs[i] for i in selected) if selected else text
+        rows.append({
+            'Text': filtered,
+            'Paragraphs': len(paragraphs),
+            'Selected_Paragraphs': len(selected) if selected else len(paragraphs),
+            'Text_Share': len(filtered) / len(text) if len(text) else 1.0,
+            'Fell_Back': not selected,
+        })
+    return pd.DataFrame(rows, columns=['Text', 'Paragraphs', 'Selected_Paragraphs', 'Text_Share', 'Fell_Back'])
+
+
+def score_two_stage(texts, recall=0.9, dictionary_paths=PREFILTER_DICTIONARIES, embedding_store=None, max_words=150,
+                    max_tokens=factor_similarity.TOKEN_BUDGET) -> pd.DataFrame:
+    """
+    Two-stage hawkish/dovish scoring: the dictionary matcher selects the candidate paragraphs of
+    each document (see prefilter_documents) and only those go through FinBERT; the scores are
+    the cosine similarities of the filtered documents to the anchor sentences.
+
+    Args:
+    texts (list): The raw document texts.
+    recall (float): Share of each document's dictionary hits the selected paragraphs must contain.
+    dictionary_paths (list): Hawkish and dovish dictionary files of the prefilter.
+    embedding_store (EmbeddingStore, optional): Store of previously computed embeddings (keyed by the filtered text).
+    max_words (int): Target maximum number of words per paragraph.
+    max_tokens (int, optional): Token budget per length-bucketed FinBERT batch.
+
+    Returns:
+    pd.DataFrame: prefilter_documents' columns (without the text) plus Hawkish_Score and Dovish_Score.
+    """
+    prefiltered_df = prefilter_documents(texts, recall, dictionary_paths, max_words)
+    document_embeddings = factor_similarity.get_document_embeddings(prefiltered_df['Text'].tolist(), embedding_store,
+                                                                    max_tokens=max_tokens)
+    scores_df = factor_similarity.score_document_embeddings(document_embeddings)
+    return pd.concat([prefiltered_df.drop(columns='Text'), scores_df], axis=1)
+
+
+def compare_with_full_document(text_files_dir='data/raw/FOMC/meeting_minutes', recalls=(1.0, 0.9, 0.75, 0.5), n_docs=None,
+                               dictionary_paths=PREFILTER_DICTIONARIES) -> pd.DataFrame:
+    """
+    Report of the two-stage mode against full-document embedding on a corpus: runtime, share of
+    the text sent to FinBERT, and agreement of the scores (Pearson correlation across documents
+    and mean absolute difference). No embedding store is used, so every run pays for its FinBERT passes.
+
+    Args:
+    text_files_dir (str): Directory containing the text files.
+    recalls (list): Recall thresholds to compare.
+    n_docs (int, optional): Only use the latest `n_docs` documents.
+
+    Returns:
+    pd.DataFrame: One row for the full-document run and one per recall threshold.
+    """
+    texts = [text for _, _, text in iter_text_files(text_files_dir)]
+    if n_docs is not None:
+        texts = texts[-n_docs:]
+
+    # Warm-up so the first timed run does not pay for the model load
+    factor_similarity.get_embedding('warm up')
+
+    start = time.perf_counter()
+    full_scores = factor_similarity.score_document_embeddings(
+        factor_similarity.get_document_embeddings(texts, max_tokens=factor_similarity.TOKEN_BUDGET))
+    full_seconds = time.perf_counter() - start
+
+    rows = [{'Mode': 'full document', 'Recall': np.nan, 'Documents': len(texts), 'Seconds': full_seconds, 'Speedup': 1.0,
+             'Text_Share': 1.0, 'Fallback_Documents': 0,
+             'Hawkish_Correlation': 1.0, 'Dovish_Correlation': 1.0, 'Hawkish_MAE': 0.0, 'Dovish_MAE': 0.0}]
+    for recall in recalls:
+        start = time.perf_counter()
+        two_stage_df = score_two_stage(texts, recall, dictionary_paths)
+        seconds = time.perf_counter() - start
+        rows.append({
+            'Mode': 'two-stage',
+            'Recall': recall,
+            'Documents': len(texts),
+            'Seconds': seconds,
+            'Speedup': full_seconds / seconds,
+            'Text_Share': two_stage_df['Text_Share'].mean(),
+            'Fallback_Documents': int(two_stage_df['Fell_Back'].sum()),
+            'Hawkish_Correlation': np.corrcoef(full_scores['Hawkish_Score'], two_stage_df['Hawkish_Score'])[0, 1],
+            'Dovish_Correlation': np.corrcoef(full_scores['Dovish_Score'], two_stage_df['Dovish_Score'])[0, 1],
+            'Hawkish_MAE': (full_scores['Hawkish_Score'] - two_stage_df['Hawkish_Score']).abs().mean(),
+            'Dovish_MAE': (full_scores['Dovish_Score'] - two_stage_df['Dovish_Score']).abs().mean(),
+        })
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    # Two-stage vs full-document FinBERT scoring on the meeting minutes
+    report_df = compare_with_full_document()
+    print(report_df)
+
+    os.makedirs('data/results', exist_ok=True)
+    report_df.to_csv('data/results/two-stage-scoring_FOMC-meeting-minutes.csv', index=False)
@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dictionary_ablation import leave_one_out_scores, leave_one_out_r_squared
+from dictionary_based_analysis import load_dictionary, build_count_matrix, get_hawkish_dovish_score
+from regression_analysis import run_regression_compute_stats
+from results import extract_date_from_filename
+
+DICTIONARY_WORDS = ['INFLATION', 'TIGHTENING', 'RESTRICTIVE', 'HIKE', 'ELEVATED']
+
+DOCUMENTS = {
+    '2020-01-29_Minutes.txt': "Inflation remained below the Committee's objective.",
+    '2020-03-15_Minutes.txt': "The Committee judged that a restrictive stance was not warranted; inflation was low.",
+    '2020-06-10_Minutes.txt': "Inflation was subdued and no hike was expected.",
+    '2021-01-27_Minutes.txt': "Inflation pressures were elevated but transitory.",
+    '2021-06-16_Minutes.txt': "Participants noted that inflation had risen; some saw tightening ahead.",
+    '2021-12-15_Minutes.txt': "Inflation was elevated, and a restrictive stance might become appropriate.",
+    '2022-03-16_Minutes.txt': "A rate hike was appropriate. Inflation was elevated, and further tightening was expected.",
+    '2022-05-04_Minutes.txt': "Inflation inflation inflation: policy would need to become restrictive.",
+    '2022-09-21_Minutes.txt': "Further tightening and another hike were needed as inflation stayed elevated.",
+    '2022-11-02_Minutes.txt': "The pace of tightening could slow; the stance was already restrictive.",
+    '2022-12-14_Minutes.txt': "Price pressures stayed elevated, so one more hike was likely.",
+}
+
+
+def _setup(tmp_path, documents):
+    dictionary_path = str(tmp_path / 'dictionary.txt')
+    with open(dictionary_path, 'w') as file:
+        file.write('\n'.join(DICTIONARY_WORDS))
+    corpus_dir = str(tmp_path / 'corpus')
+    os.makedirs(corpus_dir, exist_ok=True)
+    for txt_file, text in documents.items():
+        with open(os.path.join(corpus_dir, txt_file), 'w', encoding='utf-8') as file:
+            file.write(text)
+    return dictionary_path, corpus_dir
+
+
+def _market_data():
+    dates = pd.bdate_range('2020-01-01', '2022-12-30')
+    return pd.DataFrame({'Date': dates, 'GT10_pct_change': np.random.default_rng(0).normal(0, 0.01, len(dates))})
+
+
+def test_leave_one_out_scores_match_rescoring(tmp_path):
+    dictionary_path, corpus_dir = _setup(tmp_path, DOCUMENTS)
+    count_matrix, total_word_count, _ = build_count_matrix(DICTIONARY_WORDS, corpus_dir)
+    _, loo_scores = leave_one_out_scores(count_matrix, total_word_count)
+
+    # Rescore the corpus with a copy of the dictionary that lacks each word in turn
+    reduced_path = str(tmp_path / 'reduced_dictionary.txt')
+    for j, word in enumerate(DICTIONARY_WORDS):
+        with open(reduced_path, 'w') as file:
+            file.write('\n'.join(w for w in DICTIONARY_WORDS if w != word))
+        rescored = get_hawkish_dovish_score(reduced_path, corpus_dir, 'Hawk').iloc[:, 0].values
+        np.testing.assert_allclose(loo_scores[:, j], rescored, rtol=1e-12, atol=1e-12)
+
+
+def test_full_dictionary_r_squared_matches_regression(tmp_path, monkeypatch):
+    dictionary_path, corpus_dir = _setup(tmp_path, DOCUMENTS)
+    market_df = _market_data()
+    market_var = 'GT10_pct_change'
+
+    count_matrix, total_word_count, txt_files = build_count_matrix(load_dictionary(dictionary_path), corpus_dir)
+    full_scores, loo_scores = leave_one_out_scores(count_matrix, total_word_count)
+    r_squared = leave_one_out_r_squared(np.column_stack([full_scores, loo_scores]),
+                                        [extract_date_from_filename(f) for f in txt_files], market_df, [market_var])
+
+    # Hawkish score changes prepared the way regression_analysis.perform_market_analysis does
+    hawkish_df = get_hawkish_dovish_score(dictionary_path, corpus_dir, 'Hawk').rename_axis('Filename').reset_index()
+    hawkish_df['Date'] = hawkish_df['Filename'].apply(extract_date_from_filename)
+    hawkish_df['pct_change_hawkish'] = hawkish_df['Weighted_Hawkish_Sum'].pct_change().replace([np.inf, -np.inf], np.nan)
+    hawkish_df = hawkish_df.dropna()
+
+    # The regression saves its plot under data/ in the working directory
+    monkeypatch.chdir(tmp_path)
+    stats = run_regression_compute_stats(hawkish_df, market_df.copy(), market_var, 'pct_change_hawkish',
+                                         'Hawkishness-score-1', 'dict-hawkish-scored_test')
+    assert np.isclose(r_squared[market_var].values[0], stats['R_squared'], rtol=1e-9, atol=0)
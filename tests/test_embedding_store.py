@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pytest
+
+import embedding_store
+from embedding_store import EmbeddingStore
+
+
+def _chunk_embeddings(seed, n_chunks):
+    return np.random.default_rng(seed).normal(size=(n_chunks, 8)).astype(np.float32)
+
+
+def _segment_files(store):
+    return {name: os.path.getmtime(os.path.join(store.path, name)) for name in os.listdir(store.path) if name.startswith('segment-')}
+
+
+def test_saves_append_segments_without_rewriting(tmp_path):
+    store = EmbeddingStore(str(tmp_path), 'model', 'v1')
+    for i in range(3):
+        store.add(f'h{i}', _chunk_embeddings(i, i + 1))
+    store.save()
+    first_segment = _segment_files(store)
+
+    # A checkpoint adds a segment and leaves the earlier ones untouched
+    for i in range(3, 5):
+        store.add(f'h{i}', _chunk_embeddings(i, i + 1))
+    store.save()
+    segments = _segment_files(store)
+    assert len(segments) == 2 * len(first_segment)
+    assert all(segments[name] == mtime for name, mtime in first_segment.items())
+
+    reopened = EmbeddingStore(str(tmp_path), 'model', 'v1')
+    assert len(reopened) == 5
+    for i in range(5):
+        assert np.array_equal(reopened.get_chunk_embeddings(f'h{i}'), _chunk_embeddings(i, i + 1))
+        assert np.array_equal(reopened.get_document_embedding(f'h{i}'), _chunk_embeddings(i, i + 1).mean(axis=0))
+
+
+def test_interrupted_save_keeps_earlier_checkpoints(tmp_path, monkeypatch):
+    store = EmbeddingStore(str(tmp_path), 'model', 'v1')
+    store.add('h0', _chunk_embeddings(0, 2))
+    store.save()
+
+    # Killed while writing the second segment's index: its vectors are on disk, its index is not
+    store.add('h1', _chunk_embeddings(1, 3))
+    original_write = embedding_store._write_durably
+
+    def killed_on_index(path, write):
+        if path.endswith('.index.csv'):
+            raise KeyboardInterrupt
+        original_write(path, write)
+
+    monkeypatch.setattr(embedding_store, '_write_durably', killed_on_index)
+    with pytest.raises(KeyboardInterrupt):
+        store.save()
+    monkeypatch.setattr(embedding_store, '_write_durably', original_write)
+
+    # The resumed run sees the first checkpoint only, and its next save replaces the orphaned segment
+    resumed = EmbeddingStore(str(tmp_path), 'model', 'v1')
+    assert 'h0' in resumed and 'h1' not in resumed
+    resumed.add('h1', _chunk_embeddings(1, 3))
+    resumed.save()
+
+    reopened = EmbeddingStore(str(tmp_path), 'model', 'v1')
+    assert np.array_equal(reopened.get_chunk_embeddings('h0'), _chunk_embeddings(0, 2))
+    assert np.array_equal(reopened.get_chunk_embeddings('h1'), _chunk_embeddings(1, 3))
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+from dictionary_based_analysis import get_hawkish_dovish_score
+from incremental_scoring import IncrementalDictionaryScorer
+
+DICTIONARY_WORDS = ['INFLATION', 'TIGHTENING', 'RESTRICTIVE', 'HIKE']
+
+DOCUMENTS = {
+    '2020-01-29_Minutes.txt': "Inflation remained below the Committee's objective.",
+    '2020-03-15_Minutes.txt': "The Committee judged that a restrictive stance was not warranted.",
+    '2021-06-16_Minutes.txt': "Participants noted that inflation had risen; some saw tightening ahead.",
+    '2022-03-16_Minutes.txt': "A rate hike was appropriate. Inflation was elevated, and further tightening was expected.",
+    '2022-05-04_Minutes.txt': "Inflation inflation inflation: policy would need to become restrictive.",
+}
+
+
+def _write_corpus(corpus_dir, documents):
+    os.makedirs(corpus_dir, exist_ok=True)
+    for txt_file, text in documents.items():
+        with open(os.path.join(corpus_dir, txt_file), 'w', encoding='utf-8') as file:
+            file.write(text)
+
+
+def _assert_matches_full(scorer, dictionary_path, corpus_dir):
+    full_scores = get_hawkish_dovish_score(dictionary_path, corpus_dir, 'Hawk')
+    incremental_scores = scorer.scores()
+    assert incremental_scores.index.equals(full_scores.index)
+    assert np.array_equal(incremental_scores.values, full_scores.values)
+
+
+def _setup(tmp_path, documents):
+    dictionary_path = str(tmp_path / 'dictionary.txt')
+    with open(dictionary_path, 'w') as file:
+        file.write('\n'.join(DICTIONARY_WORDS))
+    corpus_dir = str(tmp_path / 'corpus')
+    _write_corpus(corpus_dir, documents)
+    return dictionary_path, corpus_dir
+
+
+def test_new_documents_match_full_recompute(tmp_path):
+    txt_files = sorted(DOCUMENTS)
+    dictionary_path, corpus_dir = _setup(tmp_path, {f: DOCUMENTS[f] for f in txt_files[:3]})
+
+    # Scorer state saved before the latest documents arrived, reloaded for the update
+    state_path = str(tmp_path / 'state.npz')
+    IncrementalDictionaryScorer.from_directory(dictionary_path, corpus_dir, 'Hawk').save(state_path)
+    _write_corpus(corpus_dir, {f: DOCUMENTS[f] for f in txt_files[3:]})
+
+    scorer = IncrementalDictionaryScorer.load(state_path)
+    assert scorer.update_from_directory(corpus_dir) == txt_files[3:]
+    _assert_matches_full(scorer, dictionary_path, corpus_dir)
+
+    # Nothing changed: nothing is read again
+    assert scorer.update_from_directory(corpus_dir) == []
+
+
+def test_edited_and_deleted_documents_update_document_frequencies(tmp_path):
+    dictionary_path, corpus_dir = _setup(tmp_path, DOCUMENTS)
+    scorer = IncrementalDictionaryScorer.from_directory(dictionary_path, corpus_dir, 'Hawk')
+
+    edited = '2021-06-16_Minutes.txt'
+    _write_corpus(corpus_dir, {edited: "Participants saw no need for a hike."})
+    deleted = '2022-05-04_Minutes.txt'
+    os.remove(os.path.join(corpus_dir, deleted))
+
+    assert scorer.update_from_directory(corpus_dir) == [edited]
+    assert deleted not in scorer.doc_ids
+    _assert_matches_full(scorer, dictionary_path, corpus_dir)